@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+# Danger field: how soon an enemy could reach each cell, for planners that must not walk into enemies
+
+"""
+A multi-source BFS from every enemy gives each cell its time-to-threat: the fewest enemy moves needed to reach it.
+Enemies only ever step onto empty cells, so the BFS spreads through empty cells only; a treasure or switch cell next
+to an enemy gets a time too (the agent empties it by stepping on it) but the spread stops there, and obstacles and the
+door are never reached. Cells no enemy can reach within `horizon` moves keep NO_THREAT.
+The field is refreshed lazily: update(env) does nothing while the grid state and its change counter
+(GridState.version) are the ones it was computed for, and otherwise resets only the cells the previous pass reached
+before searching again, so with a horizon the work per move_enemies is proportional to the area around the enemies
+rather than to the grid.
+The agent moves first and the enemies answer, so a cell the agent reaches after g moves is safe when its
+time-to-threat is larger than g (safe_at). The planners (Agents/pathfinding.py) use that as a hard constraint within
+the horizon, and blocked_types adds the switch -> door dependency: the door only becomes passable once the switch has
+opened it, and enemy cells are never passable.
+"""
+
+from array import array  # Flat time-to-threat by cell id
+from collections import deque  # BFS queue
+from Agents.pathfinding import DELTAS, BLOCKED
+from Environments.gridstate import EMPTY, TREASURE, SWITCH
+
+NO_THREAT = 1 << 30  # Time-to-threat of cells no enemy can reach within the horizon
+
+
+# Cell types a planner must not enter in `env` right now
+def blocked_types(env):
+    if not hasattr(env, 'door_open'):
+        return BLOCKED
+    # The door is shut until the switch is stepped on; stepping into an enemy is death
+    return BLOCKED | {'E'} if env.door_open else BLOCKED | {'E', 'D'}
+
+
+class DangerField:
+    def __init__(self, horizon=None):
+        self.horizon = horizon  # Enemy moves looked ahead; None for the whole grid
+        self.size = 0
+        self.time_to_threat = array('i')
+        self.reached = []  # Cell ids the last pass set, reset by the next one
+        self.state = None  # Grid state the field was computed for
+        self.version = -1  # Its change counter at the time
+        self.updates = 0  # Passes actually run
+
+    # Bring the field up to date with the enemies and cells of `env`
+    def update(self, env):
+        state = env.state
+        if state is self.state and state.version == self.version:
+            return self
+        self.state = state
+        self.version = state.version
+        size = env.size
+        if size != self.size:
+            self.size = size
+            self.time_to_threat = array('i', [NO_THREAT]) * (size * size)
+            self.reached = []
+        threat = self.time_to_threat
+        for cell_id in self.reached:
+            threat[cell_id] = NO_THREAT
+        cells = state.cells
+        horizon = NO_THREAT if self.horizon is None else self.horizon
+        reached = list(state.enemy_ids)
+        queue = deque(reached)
+        for cell_id in reached:
+            threat[cell_id] = 0
+        while queue:
+            cell_id = queue.popleft()
+            steps = threat[cell_id] + 1
+            if steps > horizon:
+                continue
+            x, y = divmod(cell_id, size)
+            for dx, dy in DELTAS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    neighbor = nx * size + ny
+                    if threat[neighbor] != NO_THREAT:
+                        continue
+                    code = cells[neighbor]
+                    if code == EMPTY:
+                        threat[neighbor] = steps
+                        reached.append(neighbor)
+                        queue.append(neighbor)
+                    elif code == TREASURE or code == SWITCH:
+                        # Reachable once the agent has emptied it, but enemies cannot pass through it before
+                        threat[neighbor] = steps
+                        reached.append(neighbor)
+        self.reached = reached
+        self.updates += 1
+        return self
+
+    # Fewest enemy moves to reach the cell (NO_THREAT if none within the horizon)
+    def threat(self, position):
+        return self.time_to_threat[position[0] * self.size + position[1]]
+
+    # Whether the agent can stand on `position` after its `moves`-th move without an enemy being able to get there
+    def safe_at(self, position, moves):
+        return self.time_to_threat[position[0] * self.size + position[1]] > moves
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+# Distance oracle shared by planning agents on maps whose obstacles never move
+
+"""
+Obstacles are fixed once the environment has placed its items, so BFS distance tables over the obstacle layout
+can be shared by every agent and episode that plays the same map.
+Oracles are keyed by a hash of the obstacle layout and kept in a process-wide LRU cache.
+Each oracle keeps one BFS table per source cell (the start and the treasures are where agents replan),
+expanded lazily only as far as queries need, and keeps the most recently used tables.
+Both limits are in bytes, since a table takes 4 bytes per cell: an oracle keeps as many tables as fit in
+MAX_TABLE_BYTES, and the process-wide cache drops the least recently used oracles once all of them hold more than
+MAX_CACHE_BYTES (checked whenever an oracle is handed out).
+"""
+
+import hashlib  # Hash of the obstacle layout
+from array import array  # Flat distance tables indexed by cell id
+from collections import OrderedDict, deque  # LRU caches and the BFS queue
+from Agents.pathfinding import ACTIONS, DELTAS, BLOCKED
+from Environments.gridstate import CELL_CHARS
+
+MAX_CACHE_BYTES = 256 << 20  # Table and mask bytes kept by all cached oracles together
+MAX_TABLE_BYTES = 64 << 20  # Table bytes kept per oracle, at least one table
+_OBSTACLE_TABLE = bytes(1 if code < len(CELL_CHARS) and CELL_CHARS[code] in BLOCKED else 0 for code in range(256))
+
+
+# Obstacle mask of the grid, one byte per cell id
+def obstacle_mask(env):
+    state = getattr(env, 'state', None)
+    if state is not None:
+        # Compact environments: translate the cell codes in one pass
+        return bytes(state.cells.translate(_OBSTACLE_TABLE))
+    return bytes(1 if cell in BLOCKED else 0 for row in env.grid for cell in row)
+
+
+# Key identifying the obstacle layout of an environment
+def layout_key(env, mask=None):
+    if mask is None:
+        mask = obstacle_mask(env)
+    return hashlib.blake2b(env.size.to_bytes(4, 'little') + mask, digest_size=16).hexdigest()
+
+
+# BFS from one source that only expands as far as its queries need, and resumes where it stopped
+class LazyDistanceTable:
+    def __init__(self, size, mask, source):
+        self.size = size
+        self.mask = mask
+        self.distances = array('i', [-1]) * (size * size)  # -1 where not reached (yet)
+        self.distances[source[0] * size + source[1]] = 0
+        self.queue = deque([source])
+
+    # Expand until `cell_id` is reached or the queue runs out; returns its distance, -1 if unreachable
+    def distance_to(self, cell_id):
+        distances = self.distances
+        while distances[cell_id] < 0 and self.queue:
+            self.expand()
+        return distances[cell_id]
+
+    # Expand one cell of the BFS frontier, returning the cell ids it reached
+    def expand(self):
+        size = self.size
+        mask = self.mask
+        distances = self.distances
+        x, y = self.queue.popleft()
+        next_distance = distances[x * size + y] + 1
+        reached = []
+        for dx, dy in DELTAS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < size and 0 <= ny < size:
+                cell_id = nx * size + ny
+                if distances[cell_id] < 0 and not mask[cell_id]:
+                    distances[cell_id] = next_distance
+                    self.queue.append((nx, ny))
+                    reached.append(cell_id)
+        return reached
+
+    # The target closest to the source by BFS distance, or None if none is reachable
+    def nearest(self, targets):
+        size = self.size
+        distances = self.distances
+        by_id = {target[0] * size + target[1]: target for target in targets}
+        # BFS reaches cells in order of distance, so a target reached already beats every one not reached yet
+        reached = [cell_id for cell_id in by_id if distances[cell_id] >= 0]
+        if reached:
+            return by_id[min(reached, key=distances.__getitem__)]
+        while self.queue:
+            for cell_id in self.expand():
+                if cell_id in by_id:
+                    return by_id[cell_id]
+        return None
+
+    # Up to `count` targets closest to the source, nearest first; unreachable targets are left out
+    def nearest_many(self, targets, count):
+        size = self.size
+        distances = self.distances
+        by_id = {target[0] * size + target[1]: target for target in targets}
+        found = sorted((cell_id for cell_id in by_id if distances[cell_id] >= 0), key=distances.__getitem__)
+        while len(found) < count and self.queue:
+            found.extend(cell_id for cell_id in self.expand() if cell_id in by_id)
+        return [by_id[cell_id] for cell_id in found[:count]]
+
+
+class DistanceOracle:
+    def __init__(self, size, mask, max_bytes=MAX_TABLE_BYTES):
+        self.size = size
+        self.mask = mask
+        self.table_bytes = 4 * size * size  # One int32 distance per cell
+        self.max_tables = max(1, max_bytes // self.table_bytes)
+        self.tables = OrderedDict()  # Source cell id -> its LazyDistanceTable
+        self.hits = 0
+        self.misses = 0
+        self.cached = False  # Whether its bytes count against the process-wide cache
+
+    # Bytes held by the tables and the obstacle mask
+    def nbytes(self):
+        return len(self.tables) * self.table_bytes + len(self.mask)
+
+    # Distance table of `source`, created on first use
+    def table(self, source):
+        source_id = source[0] * self.size + source[1]
+        table = self.tables.get(source_id)
+        if table is not None:
+            self.hits += 1
+            self.tables.move_to_end(source_id)
+            return table
+        self.misses += 1
+        table = self.tables[source_id] = LazyDistanceTable(self.size, self.mask, source)
+        if len(self.tables) > self.max_tables:
+            self.tables.popitem(last=False)
+        elif self.cached:
+            _charge(self.table_bytes)
+        return table
+
+    # Shortest distance between two cells, -1 if unreachable
+    def distance(self, a, b):
+        return self.table(a).distance_to(b[0] * self.size + b[1])
+
+    # Actions from `source` to `goal`, read from the table of `source` by walking back from the goal
+    def path(self, source, goal):
+        size = self.size
+        table = self.table(source)
+        x, y = goal
+        remaining = table.distance_to(x * size + y)
+        if remaining < 0:
+            return []
+        distances = table.distances
+        path = []
+        while remaining > 0:
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                # Step back to a neighbor one closer to the source; the forward action is the one that undoes it
+                px, py = x - dx, y - dy
+                if 0 <= px < size and 0 <= py < size and distances[px * size + py] == remaining - 1:
+                    path.append(ACTIONS[action_index])
+                    x, y, remaining = px, py, remaining - 1
+                    break
+        path.reverse()
+        return path
+
+    # The reachable target closest to `source` by BFS distance, or None
+    def nearest(self, source, targets):
+        return self.table(source).nearest(targets)
+
+    # Up to `count` reachable targets closest to `source`, nearest first
+    def nearest_many(self, source, targets, count):
+        return self.table(source).nearest_many(targets, count)
+
+
+# Process-wide LRU cache of oracles by layout key, and the bytes all of them hold
+_oracles = OrderedDict()
+_cached_bytes = 0
+
+
+def _charge(nbytes):
+    global _cached_bytes
+    _cached_bytes += nbytes
+
+
+def get_oracle(env):
+    mask = obstacle_mask(env)
+    key = layout_key(env, mask)
+    oracle = _oracles.get(key)
+    if oracle is None:
+        oracle = _oracles[key] = DistanceOracle(env.size, mask)
+        oracle.cached = True
+        _charge(oracle.nbytes())
+    else:
+        _oracles.move_to_end(key)
+    # Drop the least recently used layouts, never the one being handed out
+    while _cached_bytes > MAX_CACHE_BYTES and len(_oracles) > 1:
+        _, evicted = _oracles.popitem(last=False)
+        evicted.cached = False
+        _charge(-evicted.nbytes())
+    return oracle
+
+
+def clear_cache():
+    global _cached_bytes
+    for oracle in _oracles.values():
+        oracle.cached = False
+    _oracles.clear()
+    _cached_bytes = 0
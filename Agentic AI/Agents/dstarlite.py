@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+# D* Lite Agent replans incrementally as enemies move and the door opens
+
+"""
+D* Lite searches backwards from the goal (the nearest treasure) to the agent and keeps its search state between steps.
+After every step only the cells whose blocked state changed (enemies moving, the door unlocking) are re-evaluated,
+and the search repairs just the part of the plan they invalidated instead of planning from scratch.
+Blocked cells are obstacles, enemies and the door while it is locked.
+Reference: S. Koenig and M. Likhachev, "D* Lite", AAAI 2002.
+"""
+
+import heapq  # For priority queue functionality
+import random  # Fallback move when no path exists
+from array import array  # Flat g and rhs arrays indexed by cell id
+from Agents.pathfinding import ACTIONS, DELTAS, BLOCKED, manhattan, nearest_treasure
+
+INF = float('inf')
+
+
+class DStarLiteAgent:
+    def __init__(self):
+        self.grid = None  # Grid the static obstacles were read from
+        self.size = 0
+        self.static_blocked = bytearray()  # Per cell id: 1 for obstacles, fixed for a grid
+        self.dynamic_blocked = set()  # Enemies and the locked door, as seen on the last step
+        self.blocked = bytearray()  # Per cell id: static obstacles plus the current dynamic cells
+        self.goal = None
+        self.expansions = 0  # Cells expanded by the last replanning
+        self.total_expansions = 0  # Cells expanded by every replanning so far
+
+    # Selects an action based on the current environment
+    def select_action(self, env):
+        if not env.treasures:
+            return 'No Treasures left'
+        start = self.start = env.agent_position
+        if env.grid is not self.grid or self.goal not in env.treasures:
+            self.initialize(env, nearest_treasure(start, env.treasures))
+        else:
+            changed = self.dynamic_cells(env) ^ self.dynamic_blocked
+            if changed:
+                # The agent moved since the keys were computed, so their lower bound shifts by the distance travelled
+                self.km += manhattan(self.last_start, start)
+                self.last_start = start
+                self.dynamic_blocked ^= changed
+                self.apply_changes(changed)
+        self.compute_shortest_path()
+        return self.next_action(env)
+
+    # Cells blocked by enemies and the locked door
+    def dynamic_cells(self, env):
+        cells = set(getattr(env, 'enemies', ()))
+        door = getattr(env, 'door_position', None)
+        if door is not None and not env.door_open:
+            cells.add(door)
+        return cells
+
+    # Fresh search towards `goal`; obstacles are only re-read when the grid itself changed
+    def initialize(self, env, goal):
+        size = env.size
+        if env.grid is not self.grid:
+            self.grid = env.grid
+            self.size = size
+            self.static_blocked = bytearray(size * size)
+            for x in range(size):
+                for y in range(size):
+                    if env.grid[x][y] in BLOCKED:
+                        self.static_blocked[x * size + y] = 1
+        self.dynamic_blocked = self.dynamic_cells(env)
+        self.blocked = bytearray(self.static_blocked)
+        for x, y in self.dynamic_blocked:
+            self.blocked[x * size + y] = 1
+        self.goal = goal
+        self.start = self.last_start = env.agent_position
+        self.km = 0
+        self.g = array('d', [INF]) * (size * size)
+        self.rhs = array('d', [INF]) * (size * size)
+        self.queue = []
+        self.queued = {}  # Cell id -> key of its live queue entry; older heap entries are skipped
+        goal_id = self.goal_id = goal[0] * size + goal[1]
+        self.rhs[goal_id] = 0
+        self.push(goal_id, (manhattan(self.start, goal), 0))
+
+    # Flip the blocked state of `changed` cells and re-evaluate them and their neighbors
+    def apply_changes(self, changed):
+        size = self.size
+        g, rhs, blocked = self.g, self.rhs, self.blocked
+        for x, y in changed:
+            cell_id = x * size + y
+            blocked[cell_id] = (x, y) in self.dynamic_blocked or self.static_blocked[cell_id]
+            cells = [cell_id]
+            for dx, dy in DELTAS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    cells.append(nx * size + ny)
+            # Cells the search never reached keep rhs = g = inf whatever is blocked next to them
+            if any(g[c] != INF or rhs[c] != INF for c in cells):
+                for c in cells:
+                    self.update_vertex(c)
+
+    def calculate_key(self, cell_id):
+        best = min(self.g[cell_id], self.rhs[cell_id])
+        return (best + manhattan(self.start, divmod(cell_id, self.size)) + self.km, best)
+
+    def push(self, cell_id, key):
+        self.queued[cell_id] = key
+        heapq.heappush(self.queue, (key, cell_id))
+
+    # Smallest live key in the queue
+    def top_key(self):
+        queue = self.queue
+        while queue and self.queued.get(queue[0][1]) != queue[0][0]:
+            heapq.heappop(queue)
+        return queue[0][0] if queue else (INF, INF)
+
+    # Recompute rhs from the successors and (re)queue the cell if it is inconsistent
+    def update_vertex(self, cell_id):
+        size = self.size
+        if cell_id != self.goal_id:
+            best = INF
+            blocked = self.blocked
+            if not blocked[cell_id]:
+                g = self.g
+                x, y = divmod(cell_id, size)
+                if x > 0 and not blocked[cell_id - size] and g[cell_id - size] < best:
+                    best = g[cell_id - size]
+                if x < size - 1 and not blocked[cell_id + size] and g[cell_id + size] < best:
+                    best = g[cell_id + size]
+                if y > 0 and not blocked[cell_id - 1] and g[cell_id - 1] < best:
+                    best = g[cell_id - 1]
+                if y < size - 1 and not blocked[cell_id + 1] and g[cell_id + 1] < best:
+                    best = g[cell_id + 1]
+                best += 1
+            self.rhs[cell_id] = best
+        if self.g[cell_id] != self.rhs[cell_id]:
+            self.push(cell_id, self.calculate_key(cell_id))
+        else:
+            self.queued.pop(cell_id, None)
+
+    def compute_shortest_path(self):
+        size = self.size
+        g, rhs = self.g, self.rhs
+        start_id = self.start[0] * size + self.start[1]
+        expansions = 0
+        while self.top_key() < self.calculate_key(start_id) or rhs[start_id] > g[start_id]:
+            old_key, cell_id = heapq.heappop(self.queue)
+            new_key = self.calculate_key(cell_id)
+            if old_key < new_key:
+                self.push(cell_id, new_key)
+                continue
+            del self.queued[cell_id]
+            expansions += 1
+            x, y = divmod(cell_id, size)
+            if g[cell_id] > rhs[cell_id]:
+                g[cell_id] = rhs[cell_id]
+            else:
+                g[cell_id] = INF
+                self.update_vertex(cell_id)
+            for dx, dy in DELTAS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    self.update_vertex(nx * size + ny)
+        self.expansions = expansions
+        self.total_expansions += expansions
+
+    # Greedy step along the g-values; without a path, dodge to any free cell or wait by bumping into the border
+    def next_action(self, env):
+        size = self.size
+        x, y = self.start
+        best_action, best_cost = None, INF
+        free_actions, wait_actions = [], []
+        for action_index, (dx, dy) in enumerate(DELTAS):
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < size and 0 <= ny < size):
+                wait_actions.append(ACTIONS[action_index])
+            elif not self.blocked[nx * size + ny]:
+                free_actions.append(ACTIONS[action_index])
+                cost = 1 + self.g[nx * size + ny]
+                if cost < best_cost:
+                    best_action, best_cost = ACTIONS[action_index], cost
+        if best_action is not None:
+            return best_action
+        if free_actions:
+            return random.choice(free_actions)
+        if wait_actions:
+            return wait_actions[0]
+        return 'No Treasures left'
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+# Dyna-Q Agent adds planning on a learned model of the grid to the Q-learning agent
+
+"""
+Every real transition updates the Q-table as in Q-learning and is also stored in a model of the environment:
+(state, action) -> (mean reward, next_state, done). Moves are deterministic, so the last next_state seen is kept, but
+rewards are averaged over every visit: a treasure cell pays once per episode, and the mean keeps that in the model
+instead of the zero seen on the latest visit.
+After each real step the agent replays `planning_steps` simulated transitions from the model:
+- Dyna-Q (sweeping=False) backs up (state, action) pairs drawn uniformly from the model.
+- Prioritized sweeping (sweeping=True) backs up the pairs with the largest TD error first, through a priority queue.
+  After a backup of state s, the predecessors of s (pairs that led to s) are queued with their new TD error, so value
+  changes spread backwards from where the reward was found.
+Rewards propagate through the table in a few real steps instead of one step per visit, so far fewer (expensive)
+environment interactions are needed for the same values.
+In run.py the agent learns online: each select_action first learns from the step since its previous call (reward =
+score change). train.py feeds transitions through update_q_table itself and switches that off (online = False).
+"""
+
+import heapq  # Prioritized sweeping queue
+import itertools  # Tie-breaking counter for queue entries
+import random  # Model sampling for Dyna-Q planning
+from Agents.q_learning import QLearningAgent
+from Agents.qtable import ACTION_INDEX
+
+
+class DynaQAgent(QLearningAgent):
+    def __init__(self, planning_steps=10, sweeping=False, theta=1e-4, q_backend='dict', size=0, seed=None):
+        super().__init__(q_backend, size)
+        self.planning_steps = planning_steps  # Simulated backups per real step
+        self.sweeping = sweeping
+        self.theta = theta  # Smallest TD error worth queueing
+        self.rng = random.Random(seed)
+        self.online = True  # Learn from the environment inside select_action
+        self.last = None  # (env, state, action, score) of the previous online step
+        self.real_steps = 0
+        self.planning_updates = 0
+        self.reset_model()
+
+    # Forgets the model and the planning queue
+    def reset_model(self):
+        self.model = {}  # (state, action index) -> (mean reward, next_state, done)
+        self.visits = {}  # (state, action index) -> real transitions seen
+        self.observed = []  # Keys of the model, for uniform sampling
+        self.predecessors = {}  # State -> set of (state, action index) that led to it
+        self.queue = []  # Heap of (-priority, order, (state, action index))
+        self.queued = {}  # (state, action index) -> its current priority in the queue
+        self.order = itertools.count()
+
+    # Selects an action based on the current environment, after learning from the previous step when online
+    def select_action(self, env):
+        if self.online:
+            self.observe(env)
+        action = super().select_action(env)
+        if self.online:
+            self.last = (env, env.agent_position, action, env.score)
+        return action
+
+    # Learns from the step taken since the previous select_action on the same episode
+    def observe(self, env):
+        last = self.last
+        if last is None or last[0] is not env or env.score < last[3]:
+            return  # New environment or reset episode
+        _, state, action, score = last
+        self.update_q_table(state, action, env.score - score, env.agent_position)
+
+    # Updates the Q-table and the model with a real transition, then plans; nothing is bootstrapped past a `done` transition
+    def update_q_table(self, state, action, reward, next_state, done=False):
+        key = (state, ACTION_INDEX[action])
+        visits = self.visits.get(key, 0) + 1
+        self.visits[key] = visits
+        if visits == 1:
+            self.observed.append(key)
+        else:
+            mean = self.model[key][0]
+            reward = mean + (reward - mean) / visits
+        self.model[key] = (reward, next_state, done)
+        self.predecessors.setdefault(next_state, set()).add(key)
+        self.real_steps += 1
+        if self.sweeping:
+            self.push(key)
+            self.sweep()
+        else:
+            self.backup(key)
+            self.plan()
+
+    # Q-learning backup of one (state, action index) pair from the model
+    def backup(self, key):
+        state, action_index = key
+        reward, next_state, done = self.model[key]
+        self.q_table.q_learning_update(state, action_index, reward, next_state, self.alpha,
+                                       0.0 if done else self.gamma)
+
+    # TD error of one pair under the model
+    def td_error(self, key):
+        state, action_index = key
+        reward, next_state, done = self.model[key]
+        target = reward if done else reward + self.gamma * self.q_table.max_value(next_state)
+        return target - self.q_table.value(state, action_index)
+
+    # Dyna-Q: back up pairs drawn uniformly from the model
+    def plan(self):
+        observed, rng = self.observed, self.rng
+        for _ in range(self.planning_steps):
+            self.backup(observed[rng.randrange(len(observed))])
+        self.planning_updates += self.planning_steps
+
+    # Queue a pair by its TD error, unless it is below theta or already queued with a higher priority
+    def push(self, key):
+        priority = abs(self.td_error(key))
+        if priority > self.theta and priority > self.queued.get(key, 0.0):
+            self.queued[key] = priority
+            heapq.heappush(self.queue, (-priority, next(self.order), key))
+
+    # Prioritized sweeping: back up the most urgent pairs and queue their predecessors
+    def sweep(self):
+        queue, queued, predecessors = self.queue, self.queued, self.predecessors
+        for _ in range(self.planning_steps + 1):  # +1 for the real transition's own backup
+            while queue:
+                negative_priority, _, key = heapq.heappop(queue)
+                if queued.get(key) == -negative_priority:
+                    del queued[key]
+                    break
+                # Otherwise a stale entry, the pair was queued again with a higher priority
+            else:
+                return
+            self.backup(key)
+            self.planning_updates += 1
+            for predecessor in predecessors.get(key[0], ()):
+                self.push(predecessor)
+
+    # Resets the Q-table and the model
+    def reset_q_table(self):
+        super().reset_q_table()
+        self.reset_model()
+
+    # Planning counters, reported by run.py
+    def stats(self):
+        return {
+            "real_steps":          self.real_steps,
+            "planning_per_step":   self.planning_updates / self.real_steps if self.real_steps else 0.0,
+            "model_size":          len(self.model),
+        }
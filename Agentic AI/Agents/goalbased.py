@@ -1,54 +1,165 @@
 #!/usr/bin/env python3
 
-# Goal-Based Agent is heuristic-based and uses BFS algorithm to find the path to the nearest treasure
+# Goal-Based Agent uses BFS algorithm to find the path to the nearest treasure
 
 """
-Goal-Based Agent is heuristic-based and uses BFS algorithm to find the path to the nearest treasure.
+Goal-Based Agent uses a single multi-source BFS from all treasures to build a distance field over the grid,
+then follows it to the nearest reachable treasure. The field is reused across steps and only the affected region is repaired when a treasure is collected.
 BFS or Breadth-First Search is a graph traversal algorithm that explores all the neighbor nodes at the present depth prior to moving on to nodes at the next depth level.
 """
 
+from array import array  # Flat integer arrays indexed by cell id
 from collections import deque  # For deque (FIFO/LIFO queues)
+from Agents.pathfinding import ACTIONS, DELTAS, OPPOSITE  # Action order shared with the other planners
 
 class GoalBasedAgent:
     def __init__(self):
-        self.path = []
+        # Distance field towards the nearest treasure, indexed by flat cell id (x * size + y), -1 where undefined
+        self.distance = array('i')  # BFS steps to the nearest reachable treasure
+        self.next_action = array('i')  # Index into ACTIONS of the first step towards it
+        self.source = array('i')  # Cell id of the treasure it leads to
+        self.field_grid = None  # Grid the field was built for
+        self.field_treasures = set()  # Treasures the field was built for
 
     # Selects an action based on the current environment
     def select_action(self, env):
-        if not self.path:
-            if not env.treasures:
-                return 'No Treasures left'
-            self.path = self.find_path_to_nearest_treasure(env)
-        if self.path:
-            return self.path.pop(0)
-        else:
+        if not env.treasures:
             return 'No Treasures left'
+        self.update_distance_field(env)
+        x, y = env.agent_position
+        action_index = self.next_action[x * env.size + y]
+        if action_index < 0:
+            return 'No Treasures left'
+        return ACTIONS[action_index]
+
+    # Reuses the distance field across steps: rebuilt for a new grid, repaired locally when treasures were collected
+    def update_distance_field(self, env):
+        if env.grid is not self.field_grid or len(self.distance) != env.size * env.size:
+            self.build_distance_field(env)
+        elif len(env.treasures) != len(self.field_treasures):
+            remaining = set(env.treasures)
+            for treasure in self.field_treasures - remaining:
+                self.remove_treasure(env, treasure)
+            self.field_treasures = remaining
+
+    # Multi-source BFS from every treasure at once, storing for each cell the first action towards its nearest treasure
+    # O(cells) time and memory, so the agent always heads for the nearest treasure it can actually reach
+    def build_distance_field(self, env):
+        size = env.size
+        grid = env.grid
+        distance = array('i', [-1]) * (size * size)
+        next_action = array('i', [-1]) * (size * size)
+        source = array('i', [-1]) * (size * size)
+        queue = deque()
+        for x, y in env.treasures:
+            distance[x * size + y] = 0
+            source[x * size + y] = x * size + y
+            queue.append((x, y))
+        while queue:
+            x, y = queue.popleft()
+            cell_id = x * size + y
+            next_distance = distance[cell_id] + 1
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    neighbor_id = nx * size + ny
+                    if distance[neighbor_id] < 0 and grid[nx][ny] != 'O':
+                        distance[neighbor_id] = next_distance
+                        # The neighbor was reached by this move, so it walks back the opposite way
+                        next_action[neighbor_id] = OPPOSITE[action_index]
+                        source[neighbor_id] = source[cell_id]
+                        queue.append((nx, ny))
+        self.distance, self.next_action, self.source = distance, next_action, source
+        self.field_grid = grid
+        self.field_treasures = set(env.treasures)
 
-    # Finds the path to the nearest treasure using BFS
+    # Repairs the field after a treasure is collected, touching only the cells that were heading for it
+    def remove_treasure(self, env, treasure):
+        size = env.size
+        grid = env.grid
+        distance, next_action, source = self.distance, self.next_action, self.source
+        treasure_id = treasure[0] * size + treasure[1]
+
+        # Clear the treasure's region; it is connected through the BFS parent links
+        region = [treasure]
+        distance[treasure_id] = next_action[treasure_id] = source[treasure_id] = -1
+        stack = [treasure]
+        while stack:
+            x, y = stack.pop()
+            for dx, dy in DELTAS:
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    neighbor_id = nx * size + ny
+                    if source[neighbor_id] == treasure_id:
+                        distance[neighbor_id] = next_action[neighbor_id] = source[neighbor_id] = -1
+                        region.append((nx, ny))
+                        stack.append((nx, ny))
+
+        # Refill the region from its border with the other treasures' regions (unit-cost Dijkstra on distance buckets)
+        buckets = {}
+        for x, y in region:
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size and distance[nx * size + ny] >= 0:
+                    neighbor_id = nx * size + ny
+                    buckets.setdefault(distance[neighbor_id] + 1, []).append((x, y, action_index, source[neighbor_id]))
+        cell_distance = min(buckets, default=0)
+        while buckets:
+            bucket = buckets.pop(cell_distance, ())
+            following = buckets.setdefault(cell_distance + 1, [])
+            for x, y, action_index, cell_source in bucket:
+                cell_id = x * size + y
+                if distance[cell_id] >= 0:
+                    continue
+                distance[cell_id] = cell_distance
+                next_action[cell_id] = action_index
+                source[cell_id] = cell_source
+                for neighbor_action, (dx, dy) in enumerate(DELTAS):
+                    nx, ny = x + dx, y + dy
+                    # Unsettled open cells next to the region can only be part of the region itself
+                    if 0 <= nx < size and 0 <= ny < size and distance[nx * size + ny] < 0 and grid[nx][ny] != 'O':
+                        following.append((nx, ny, OPPOSITE[neighbor_action], cell_source))
+            if not following:
+                del buckets[cell_distance + 1]
+            cell_distance += 1
+
+    # Finds the path to the nearest reachable treasure by following the distance field
     def find_path_to_nearest_treasure(self, env):
-        start = env.agent_position
-        treasures = env.treasures.copy()
-        nearest_treasure = min(treasures, key=lambda treasure: abs(start[0] - treasure[0]) + abs(start[1] - treasure[1]))  # Lambda to fast check on each treasure location beforehand
-        path = self.pathfinding(start, nearest_treasure, env)
+        self.update_distance_field(env)
+        size = env.size
+        x, y = env.agent_position
+        path = []
+        while self.distance[x * size + y] > 0:
+            action_index = self.next_action[x * size + y]
+            path.append(ACTIONS[action_index])
+            x, y = x + DELTAS[action_index][0], y + DELTAS[action_index][1]
         return path
 
-    # Pathfinding using BFS(Breadth-First Search)
+    # Pathfinding using BFS(Breadth-First Search) with parent pointers in flat arrays
     def pathfinding(self, start, goal, env):
-        queue = deque()
-        queue.append((start, []))
-        visited = set()
+        size = env.size
+        parent_action = [-1] * (size * size)
+        visited = bytearray(size * size)
+        visited[start[0] * size + start[1]] = 1
+        queue = deque([start])
         while queue:
-            current_position, path = queue.popleft()
-            if current_position == goal:
-                return path
-            if current_position in visited:
-                continue
-            visited.add(current_position)
-            for action in self.get_possible_actions(current_position, env):
-                new_position = self.get_new_position(current_position, action)
-                if env.is_valid_position(new_position):
-                    if env.grid[new_position[0]][new_position[1]] != 'O':
-                        queue.append((new_position, path + [action]))
+            x, y = queue.popleft()
+            if (x, y) == goal:
+                # Walk the parent pointers back to the start
+                path = []
+                while (x, y) != start:
+                    action_index = parent_action[x * size + y]
+                    path.append(ACTIONS[action_index])
+                    x, y = x - DELTAS[action_index][0], y - DELTAS[action_index][1]
+                return path[::-1]
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size:
+                    cell_id = nx * size + ny
+                    if not visited[cell_id] and env.grid[nx][ny] != 'O':
+                        visited[cell_id] = 1
+                        parent_action[cell_id] = action_index
+                        queue.append((nx, ny))
         return []
 
     # Get possible actions based on the current position
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+# Hogwild Q-Learning Agent shares one Q-table between actor processes through shared memory
+
+"""
+The Q-values live in a multiprocessing.shared_memory block laid out like DenseQTable (float32 values by
+(x * size + y) * 4 + action, followed by one "seen" byte per cell), so any number of processes can attach to the same
+table by name and update it without locks (Hogwild!). A lost update when two actors write the same entry at once is
+rare on a grid and only costs a little progress, while no actor ever waits for another.
+The agent behaves like QLearningAgent with q_backend='dense'; the table cannot grow, so `size` is required.
+The process that creates the table owns it and frees it in close(); actors attach with table_name and only detach.
+train.py --workers N runs the actors; export_q_table() copies the final values out of shared memory.
+"""
+
+import numpy as np  # Views of the shared block
+from multiprocessing.shared_memory import SharedMemory  # The table itself
+from Agents.q_learning import QLearningAgent
+from Agents.qtable import ACTIONS, DenseQTable
+
+
+class SharedQTable(DenseQTable):
+    def __init__(self, size, name=None):
+        cells = size * size
+        values_bytes = cells * len(ACTIONS) * 4
+        self.owner = name is None
+        self.shm = SharedMemory(name=name, create=self.owner, size=max(1, values_bytes + cells))
+        self.size = size
+        buf = self.shm.buf
+        self.q = np.ndarray((size, size, len(ACTIONS)), dtype=np.float32, buffer=buf)
+        self.flat = buf[:values_bytes].cast('f')
+        self.seen = buf[values_bytes:values_bytes + cells]
+        self.visited = np.ndarray((size, size), dtype=np.uint8, buffer=buf, offset=values_bytes)
+        if self.owner:
+            self.clear()
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    # Zero every value, in place, so attached processes see it
+    def clear(self):
+        self.q[:] = 0
+        self.visited[:] = 0
+
+    # Shared tables cannot be reallocated, every state must fit from the start
+    def fit(self, state):
+        x, y = state
+        if x >= self.size or y >= self.size:
+            raise ValueError(f"State {state} is outside the shared {self.size}x{self.size} Q-table")
+
+    def __len__(self):
+        return int(self.visited.sum())
+
+    # Private DenseQTable with the current values
+    def copy(self):
+        table = DenseQTable(self.size)
+        table.q[:] = self.q
+        table.visited[:] = self.visited
+        return table
+
+    # Detach from the block, and free it when this process created it
+    def close(self):
+        if self.shm is None:
+            return
+        # Views into the block must go before it can be closed
+        self.flat.release()
+        self.seen.release()
+        self.q = self.visited = self.flat = self.seen = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+        self.shm = None
+
+
+class HogwildQLearningAgent(QLearningAgent):
+    def __init__(self, size, table_name=None):
+        super().__init__('dense', 0)
+        self.size = size
+        self.q_table = SharedQTable(size, table_name)  # New table, or the one named table_name
+
+    # Name actors attach with
+    @property
+    def table_name(self):
+        return self.q_table.name
+
+    # Resets the Q-table for every attached process
+    def reset_q_table(self):
+        self.q_table.clear()
+
+    # The learned values as a private DenseQTable, saved as a .npy array of shape (size, size, 4) when given a path
+    def export_q_table(self, path=None):
+        table = self.q_table.copy()
+        if path is not None:
+            np.save(path, table.q)
+        return table
+
+    # Releases the shared table (freed once the creating agent closes)
+    def close(self):
+        self.q_table.close()
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+
+# HPA* Agent plans on an abstract graph of grid clusters for very large grids
+
+"""
+Hierarchical Path-Finding A* (HPA*, Botea, Müller and Schaeffer, 2004) splits the grid into square clusters.
+Entrances are the open stretches along the border between two neighboring clusters; each becomes one or two pairs
+of abstract nodes, and the nodes of a cluster are linked by their BFS distances inside that cluster.
+A* runs on this abstract graph, and each abstract edge is refined into moves only when the agent gets to it.
+Cluster data is built lazily the first time a search touches it, and when a cell changes (the door unlocking,
+a treasure being collected) only the clusters and borders around that cell are rebuilt, if its walkability changed.
+"""
+
+import heapq  # For priority queue functionality
+from collections import deque  # BFS queues and the planned actions
+from Agents.pathfinding import ACTIONS, DELTAS, BLOCKED, manhattan, nearest_treasure
+
+CLUSTER_SIZE = 32  # Cells per cluster side
+LONG_ENTRANCE = 6  # Entrances at least this long get a transition at each end instead of one in the middle
+
+
+class ClusterGraph:
+    def __init__(self, env, cluster_size=CLUSTER_SIZE, blocked=BLOCKED):
+        self.env = env
+        self.size = env.size
+        self.cluster_size = cluster_size
+        self.clusters_per_side = -(-env.size // cluster_size)
+        self.blocked = blocked
+        self.borders = {}  # (cluster, 'down' or 'right') -> transitions [(cell id inside, cell id across)]
+        self.edges = {}  # Cluster -> {node cell id: [(neighbor cell id, cost)]}
+        self.masks = {}  # Cluster -> walkability of its cells
+        self.walkable_when_built = {}  # Cell id -> walkability the cluster data was built with
+        self.rebuilds = 0  # Clusters whose data was (re)built
+
+    # Walkable cells: not blocked, and not the door while it is locked
+    def walkable(self, x, y):
+        if not (0 <= x < self.size and 0 <= y < self.size) or self.env.grid[x][y] in self.blocked:
+            return False
+        return not (self.env.grid[x][y] == 'D' and not getattr(self.env, 'door_open', True))
+
+    def cluster_of(self, x, y):
+        return (x // self.cluster_size, y // self.cluster_size)
+
+    # Cell bounds (first row, last row + 1, first col, last col + 1) of a cluster
+    def bounds(self, cluster):
+        cs = self.cluster_size
+        return (cluster[0] * cs, min((cluster[0] + 1) * cs, self.size),
+                cluster[1] * cs, min((cluster[1] + 1) * cs, self.size))
+
+    # Transitions across the bottom ('down') or right ('right') border of a cluster
+    def border(self, cluster, direction):
+        key = (cluster, direction)
+        if key in self.borders:
+            return self.borders[key]
+        size = self.size
+        top, bottom, left, right = self.bounds(cluster)
+        if direction == 'down':
+            pairs = [((bottom - 1, y), (bottom, y)) for y in range(left, right)] if bottom < size else []
+        else:
+            pairs = [((x, right - 1), (x, right)) for x in range(top, bottom)] if right < size else []
+
+        transitions = []
+        stretch = []
+        for inside, across in pairs + [(None, None)]:
+            if inside is not None and self.walkable(*inside) and self.walkable(*across):
+                stretch.append((inside, across))
+                continue
+            # A stretch of open pairs ended: place its transitions
+            if len(stretch) >= LONG_ENTRANCE:
+                chosen = [stretch[0], stretch[-1]]
+            elif stretch:
+                chosen = [stretch[len(stretch) // 2]]
+            else:
+                chosen = []
+            for (ix, iy), (ax, ay) in chosen:
+                transitions.append((ix * size + iy, ax * size + ay))
+            stretch = []
+        for inside, across in pairs:
+            for x, y in inside, across:
+                self.walkable_when_built[x * size + y] = self.walkable(x, y)
+        self.borders[key] = transitions
+        return transitions
+
+    # Abstract nodes of a cluster with their inter-cluster partners
+    def transitions(self, cluster):
+        cx, cy = cluster
+        result = self.border(cluster, 'down') + self.border(cluster, 'right')
+        if cx > 0:
+            result += [(across, inside) for inside, across in self.border((cx - 1, cy), 'down')]
+        if cy > 0:
+            result += [(across, inside) for inside, across in self.border((cx, cy - 1), 'right')]
+        return result
+
+    # Walkability of a cluster's cells as a local bytearray, indexed (x - top) * width + (y - left)
+    def cluster_mask(self, cluster):
+        mask = self.masks.get(cluster)
+        if mask is not None:
+            return mask
+        size = self.size
+        top, bottom, left, right = self.bounds(cluster)
+        mask = bytearray()
+        for x in range(top, bottom):
+            for y in range(left, right):
+                walkable = self.walkable(x, y)
+                mask.append(walkable)
+                self.walkable_when_built[x * size + y] = walkable
+        self.masks[cluster] = mask
+        return mask
+
+    # BFS inside a cluster from `source` until every target is reached; returns local distances and parent actions
+    def bfs_in_cluster(self, cluster, source, targets):
+        size = self.size
+        top, bottom, left, right = self.bounds(cluster)
+        height, width = bottom - top, right - left
+        mask = self.cluster_mask(cluster)
+        distance = [-1] * (height * width)
+        parent = [-1] * (height * width)
+        remaining = {(target // size - top) * width + (target % size - left) for target in targets}
+        sx, sy = divmod(source, size)
+        start = (sx - top) * width + (sy - left)
+        distance[start] = 0
+        remaining.discard(start)
+        queue = deque([start])
+        while queue and remaining:
+            current = queue.popleft()
+            x, y = divmod(current, width)
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < height and 0 <= ny < width:
+                    neighbor = nx * width + ny
+                    if distance[neighbor] < 0 and mask[neighbor]:
+                        distance[neighbor] = distance[current] + 1
+                        parent[neighbor] = action_index
+                        queue.append(neighbor)
+                        remaining.discard(neighbor)
+        return distance, parent
+
+    # BFS distances inside a cluster from `source` to each reachable target, by cell id
+    def distances_in_cluster(self, cluster, source, targets):
+        size = self.size
+        top, _, left, right = self.bounds(cluster)
+        width = right - left
+        distance, _ = self.bfs_in_cluster(cluster, source, targets)
+        result = {}
+        for target in targets:
+            local = (target // size - top) * width + (target % size - left)
+            if distance[local] >= 0:
+                result[target] = distance[local]
+        return result
+
+    # Abstract edges of a cluster: BFS distances between its nodes plus the unit edges across its borders
+    def cluster_edges(self, cluster):
+        edges = self.edges.get(cluster)
+        if edges is not None:
+            return edges
+        self.rebuilds += 1
+        edges = {}
+        transitions = self.transitions(cluster)
+        nodes = {inside for inside, _ in transitions}
+        for inside, across in transitions:
+            edges.setdefault(inside, []).append((across, 1))
+        for node in nodes:
+            distance = self.distances_in_cluster(cluster, node, nodes)
+            edges[node].extend((other, cost) for other, cost in distance.items() if other != node)
+        self.edges[cluster] = edges
+        return edges
+
+    # Rebuild only the clusters and borders around cells whose walkability changed; returns whether any did
+    def update_cells(self, cells):
+        size = self.size
+        changed = False
+        for x, y in cells:
+            cell_id = x * size + y
+            if cell_id not in self.walkable_when_built or self.walkable_when_built[cell_id] == self.walkable(x, y):
+                continue
+            cluster = self.cluster_of(x, y)
+            cx, cy = cluster
+            top, bottom, left, right = self.bounds(cluster)
+            stale = {cluster}
+            if x == bottom - 1:
+                self.borders.pop((cluster, 'down'), None)
+                stale.add((cx + 1, cy))
+            if y == right - 1:
+                self.borders.pop((cluster, 'right'), None)
+                stale.add((cx, cy + 1))
+            if x == top and cx > 0:
+                self.borders.pop(((cx - 1, cy), 'down'), None)
+                stale.add((cx - 1, cy))
+            if y == left and cy > 0:
+                self.borders.pop(((cx, cy - 1), 'right'), None)
+                stale.add((cx, cy - 1))
+            self.masks.pop(cluster, None)
+            for stale_cluster in stale:
+                self.edges.pop(stale_cluster, None)
+            self.walkable_when_built[cell_id] = self.walkable(x, y)
+            changed = True
+        return changed
+
+    # Abstract path (list of cell ids) from `start` to `goal`, or [] if there is none
+    def abstract_path(self, start, goal):
+        size = self.size
+        start_id, goal_id = start[0] * size + start[1], goal[0] * size + goal[1]
+        start_cluster, goal_cluster = self.cluster_of(*start), self.cluster_of(*goal)
+
+        # Temporary edges from the start into its cluster's nodes, and from the goal cluster's nodes to the goal
+        start_nodes = set(self.cluster_edges(start_cluster))
+        if start_cluster == goal_cluster:
+            start_nodes.add(goal_id)
+        start_edges = list(self.distances_in_cluster(start_cluster, start_id, start_nodes).items())
+        goal_distance = self.distances_in_cluster(goal_cluster, goal_id, set(self.cluster_edges(goal_cluster)))
+
+        g_score = {start_id: 0}
+        parent = {start_id: None}
+        queue = [(manhattan(start, goal), 0, start_id)]
+        while queue:
+            _, negative_g, current = heapq.heappop(queue)
+            if -negative_g > g_score[current]:
+                continue
+            if current == goal_id:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                return path[::-1]
+            x, y = divmod(current, size)
+            neighbors = self.cluster_edges(self.cluster_of(x, y)).get(current, [])
+            if current == start_id:
+                neighbors = neighbors + start_edges
+            if current in goal_distance:
+                neighbors = neighbors + [(goal_id, goal_distance[current])]
+            for neighbor, cost in neighbors:
+                tentative_g = g_score[current] + cost
+                if tentative_g < g_score.get(neighbor, float('inf')):
+                    g_score[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    nx, ny = divmod(neighbor, size)
+                    heapq.heappush(queue, (tentative_g + abs(nx - goal[0]) + abs(ny - goal[1]), -tentative_g, neighbor))
+        return []
+
+    # Moves for one abstract edge: a single step across a border, or a BFS path inside a cluster
+    def refine(self, source, target):
+        size = self.size
+        sx, sy = divmod(source, size)
+        tx, ty = divmod(target, size)
+        cluster = self.cluster_of(sx, sy)
+        if cluster != self.cluster_of(tx, ty):
+            return [ACTIONS[DELTAS.index((tx - sx, ty - sy))]]
+        top, _, left, right = self.bounds(cluster)
+        width = right - left
+        _, parent = self.bfs_in_cluster(cluster, source, {target})
+        path = []
+        while (tx, ty) != (sx, sy):
+            action_index = parent[(tx - top) * width + (ty - left)]
+            path.append(ACTIONS[action_index])
+            tx, ty = tx - DELTAS[action_index][0], ty - DELTAS[action_index][1]
+        return path[::-1]
+
+
+class HPAAgent:
+    def __init__(self, cluster_size=CLUSTER_SIZE):
+        self.cluster_size = cluster_size
+        self.graph = None
+        self.grid = None  # Grid the cluster graph was built for
+        self.path = deque()  # Moves of the abstract edge being followed
+        self.abstract = deque()  # Remaining abstract nodes, refined one edge at a time
+        self.treasures = set()
+        self.door_open = None
+
+    # Selects an action based on the current environment
+    def select_action(self, env):
+        if not env.treasures:
+            return 'No Treasures left'
+        if env.grid is not self.grid:
+            self.grid = env.grid
+            self.graph = ClusterGraph(env, self.cluster_size)
+            self.treasures = set(env.treasures)
+            self.door_open = getattr(env, 'door_open', None)
+            self.path, self.abstract = deque(), deque()
+        else:
+            self.watch_changes(env)
+
+        if not self.path and len(self.abstract) < 2:
+            start = env.agent_position
+            self.abstract = deque(self.graph.abstract_path(start, nearest_treasure(start, env.treasures)))
+        if not self.path and len(self.abstract) >= 2:
+            source = self.abstract.popleft()
+            self.path = deque(self.graph.refine(source, self.abstract[0]))
+        if self.path:
+            return self.path.popleft()
+        return 'No Treasures left'
+
+    # Pass cells that may have changed (collected treasures, the door) to the graph; replan if walkability changed
+    def watch_changes(self, env):
+        changed = []
+        if len(env.treasures) != len(self.treasures):
+            remaining = set(env.treasures)
+            changed += self.treasures - remaining
+            self.treasures = remaining
+        door_open = getattr(env, 'door_open', None)
+        if door_open != self.door_open:
+            self.door_open = door_open
+            changed.append(env.door_position)
+        if changed and self.graph.update_cells(changed):
+            self.path, self.abstract = deque(), deque()
@@ -2,36 +2,147 @@
 
 # Hybrid Agent combines the features of the various agents to make decisions
 
-import random
+"""
+Hybrid Agent runs its sub-agents as a portfolio. They are asked lazily in order of preference (the planners first, the
+random reflex agents last) and the first usable direction wins, so later sub-agents are not run at all.
+For every sub-agent it tracks the mean latency (exponential moving average) and the success rate, where a success is a
+direction that actually moved the agent. Each decision has a time budget: a sub-agent whose mean latency no longer fits
+in what is left of it is skipped, and so is one whose success rate fell below min_success_rate. Every retry_every
+decisions is a retry that asks the sub-agents regardless of both, so a skipped sub-agent gets a fresh latency sample
+and can come back. A sub-agent's first call, which pays one-time costs such as building its distance tables, is left
+out of its latency average. The simple reflex agent is always available as the last resort, so decision latency stays
+bounded by the budget plus one sub-agent call outside the retries.
+Plans are cached between steps: the goal-based distance field and the utility agent's A* path are kept while the same
+sub-agent keeps deciding, and a path is dropped once another sub-agent has moved the agent or its move was blocked.
+"""
+
+import time  # Per-decision time budget and latencies
 from Agents.simplereflex import SimpleReflexAgent
 from Agents.modelbasedreflex import ModelBasedReflexAgent
 from Agents.goalbased import GoalBasedAgent
 from Agents.utilitybased import UtilityBasedAgent
 from Agents.q_learning import QLearningAgent as LearningAgent
+from Agents.pathfinding import ACTIONS
+
+LATENCY_SMOOTHING = 0.2  # Weight of the newest call in the latency average
+
+
+class SubAgent:
+    __slots__ = ('name', 'agent', 'call', 'calls', 'successes', 'latency', 'timed', 'chosen')
+
+    def __init__(self, name, agent, call):
+        self.name = name
+        self.agent = agent
+        self.call = call  # Asks the agent for an action given the environment
+        self.calls = 0
+        self.successes = 0
+        self.latency = 0.0  # Seconds, moving average
+        self.timed = 0  # Calls made, the first of which is not averaged
+        self.chosen = 0  # Decisions this sub-agent made
+
+    # Success rate with one success and one failure assumed up front, so new sub-agents start at 0.5
+    def success_rate(self):
+        return (self.successes + 1) / (self.calls + 2)
+
 
 class HybridAgent:
-    def __init__(self):
+    def __init__(self, time_budget=0.01, min_success_rate=0.2, retry_every=20):
+        self.time_budget = time_budget  # Seconds per decision
+        self.min_success_rate = min_success_rate
+        self.retry_every = retry_every
         self.simple_reflex_agent = SimpleReflexAgent()
         self.model_based_reflex_agent = ModelBasedReflexAgent()
         self.goal_based_agent = GoalBasedAgent()
         self.utility_based_agent = UtilityBasedAgent()
         self.learning_agent = LearningAgent()
+        # Order of preference; the last one always answers
+        self.portfolio = [
+            SubAgent('goal_based', self.goal_based_agent, lambda e: self.goal_based_agent.select_action(e)),
+            SubAgent('utility_based', self.utility_based_agent, lambda e: self.utility_based_agent.select_action(e)),
+            SubAgent('learning', self.learning_agent, lambda e: self.learning_agent.select_action(e)),
+            SubAgent('model_based_reflex', self.model_based_reflex_agent,
+                     lambda e: self.model_based_reflex_agent.select_action(e.agent_position, e)),
+            SubAgent('simple_reflex', self.simple_reflex_agent, lambda e: self.simple_reflex_agent.select_action()),
+        ]
+        self.last = None  # (sub-agent, position before its action) of the previous decision
+        self.blocked = False  # Whether that action left the agent where it was
+        self.decisions = 0
+        self.decision_time = 0.0
+        self.max_decision_time = 0.0
 
     def select_action(self, env):
-        for agent in [
-            lambda e: self.simple_reflex_agent.select_action(),
-            lambda e: self.model_based_reflex_agent.select_action(e.agent_position, e),
-            lambda e: self.goal_based_agent.select_action(e),
-            lambda e: self.utility_based_agent.select_action(e),
-            lambda e: self.learning_agent.select_action(e),
-        ]:
-            try:
-                action = agent(env)
-                if action and action in ['UP', 'DOWN', 'LEFT', 'RIGHT']:
-                    return action
-            except:
-                continue
-        return 'No valid actions left'
+        start = time.perf_counter()
+        deadline = start + self.time_budget
+        self.record_outcome(env)
+        self.decisions += 1
+        retry = self.decisions % self.retry_every == 0
+        fallback = self.portfolio[-1]
+        action, chosen = None, None
+        for sub_agent in self.portfolio:
+            if sub_agent is not fallback and not retry:
+                if sub_agent.success_rate() < self.min_success_rate:
+                    continue
+                if time.perf_counter() + sub_agent.latency > deadline:
+                    continue
+            action = self.ask(sub_agent, env)
+            if action in ACTIONS:
+                chosen = sub_agent
+                break
+            sub_agent.calls += 1  # An unusable answer counts as a failure
+        elapsed = time.perf_counter() - start
+        self.decision_time += elapsed
+        self.max_decision_time = max(self.max_decision_time, elapsed)
+        if chosen is None:
+            self.last = None
+            return 'No valid actions left'
+        chosen.chosen += 1
+        self.last = (chosen, env.agent_position)
+        return action
+
+    # One timed call; a sub-agent that raises just gives no action
+    def ask(self, sub_agent, env):
+        self.drop_stale_plan(sub_agent)
+        started = time.perf_counter()
+        try:
+            action = sub_agent.call(env)
+        except Exception:
+            action = None
+        elapsed = time.perf_counter() - started
+        sub_agent.timed += 1
+        if sub_agent.timed == 2:
+            sub_agent.latency = elapsed  # First call after the one-time setup starts the average
+        elif sub_agent.timed > 2:
+            sub_agent.latency += LATENCY_SMOOTHING * (elapsed - sub_agent.latency)
+        return action
+
+    # Credit the previous decision: it succeeded if the agent moved
+    def record_outcome(self, env):
+        if self.last is None:
+            return
+        sub_agent, position = self.last
+        sub_agent.calls += 1
+        self.blocked = env.agent_position == position
+        if not self.blocked:
+            sub_agent.successes += 1
+
+    # A cached path only holds while its own sub-agent made every move since it was planned
+    def drop_stale_plan(self, sub_agent):
+        path = getattr(sub_agent.agent, 'path', None)
+        if not path or self.last is None:
+            return
+        if self.last[0] is not sub_agent or self.blocked:
+            path.clear()
+
+    # Decision latency and the share of decisions each sub-agent made, reported by run.py
+    def stats(self):
+        decisions = self.decisions or 1
+        stats = {
+            "mean_decision_us": 1e6 * self.decision_time / decisions,
+            "max_decision_us":  1e6 * self.max_decision_time,
+        }
+        for sub_agent in self.portfolio:
+            stats[f"{sub_agent.name}_share"] = sub_agent.chosen / decisions
+        return stats
 
     def update_q_table(self, *args, **kwargs):
         self.learning_agent.update_q_table(*args, **kwargs)
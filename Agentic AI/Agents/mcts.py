@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+
+# MCTS Agent plans against the random enemy moves with Monte Carlo Tree Search
+
+"""
+Monte Carlo Tree Search over the environment's own dynamics: every iteration restores a private clone of the
+environment (env.snapshot / env.restore), walks down the tree with UCT, expands one new action and finishes with a
+rollout in which the agent mostly heads for the nearest treasure while the enemies move at random.
+Below each action the tree branches on what the random enemies did (chance nodes keyed by the agent and enemy
+positions), so every decision node stands for one concrete situation.
+Each decision runs for a fixed time budget. The subtree of the outcome that actually happened is kept as the next root.
+With workers > 0 the search is root-parallel: worker processes search their own trees on copies of the environment
+for the same budget and their root statistics are added to the local ones before the action is chosen.
+Returns count collected treasures, a death costs DEATH_PENALTY, and unfinished rollouts are scored by their distance
+to the nearest treasure.
+"""
+
+import math  # UCT exploration term
+import random  # Action order, rollouts and enemy seeds
+import time  # Per-decision time budget
+from concurrent.futures import ProcessPoolExecutor  # Root-parallel searches
+from Agents.pathfinding import ACTIONS, DELTAS, manhattan
+from Environments.gridstate import OBSTACLE, DOOR, ENEMY  # Cells a rollout does not step into
+
+DEATH_PENALTY = 10.0  # In treasures
+DISTANCE_WEIGHT = 0.5  # Value of being next to a treasure rather than a grid width away, in treasures
+
+
+class Node:
+    __slots__ = ('children', 'visits', 'value')
+
+    def __init__(self):
+        self.children = {}  # Decision nodes: action -> chance node; chance nodes: outcome -> decision node
+        self.visits = 0
+        self.value = 0.0  # Sum of the returns of the iterations that went through the node
+
+
+# What a step can change besides the score: where the agent and the enemies ended up
+def outcome(env):
+    return env.agent_position, tuple(getattr(env, 'enemies', ()))
+
+
+class MCTSAgent:
+    def __init__(self, time_budget=0.05, rollout_depth=20, exploration=1.0, gamma=0.95, rollout_greedy=0.5,
+                 workers=0, seed=None):
+        self.time_budget = time_budget  # Seconds of search per decision
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.gamma = gamma
+        self.rollout_greedy = rollout_greedy  # Chance that a rollout step heads for the nearest treasure
+        self.workers = workers
+        # Without a seed the generator is drawn from the global one, so random.seed() still makes runs repeatable
+        self.rng = random.Random(seed if seed is not None else random.getrandbits(64))
+        self.pool = None
+        self.chance = None  # Chance node of the last action taken, its children are candidate next roots
+        self.grid = None  # Grid of the episode the tree belongs to
+        self.decisions = 0
+        self.rollouts = 0
+        self.search_time = 0.0
+        self.reused = 0  # Decisions that started from the previous subtree
+
+    # Selects an action based on the current environment
+    def select_action(self, env):
+        if not env.treasures:
+            return 'No Treasures left'
+        start = time.perf_counter()
+        root = None
+        if self.chance is not None and env.grid is self.grid:
+            root = self.chance.children.get(outcome(env))
+        if root is not None:
+            self.reused += 1
+        else:
+            root = Node()
+            self.grid = env.grid
+
+        futures = []
+        if self.workers:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.workers)
+            settings = self.settings()
+            futures = [self.pool.submit(search_worker, env.clone(), settings, self.rng.getrandbits(32))
+                       for _ in range(self.workers)]
+        self.search(env, root, start + self.time_budget)
+
+        # Root statistics: the local tree plus every worker's
+        totals = {action: [child.visits, child.value] for action, child in root.children.items()}
+        for future in futures:
+            stats, rollouts = future.result()
+            self.rollouts += rollouts
+            for action, (visits, value) in stats.items():
+                entry = totals.setdefault(action, [0, 0.0])
+                entry[0] += visits
+                entry[1] += value
+        self.decisions += 1
+        self.search_time += time.perf_counter() - start
+        if not totals:
+            return 'No Treasures left'
+        action = max(totals, key=lambda a: (totals[a][0], totals[a][1]))
+        self.chance = root.children.get(action)
+        return action
+
+    # Constructor arguments for the worker searches
+    def settings(self):
+        return {
+            "time_budget":    self.time_budget,
+            "rollout_depth":  self.rollout_depth,
+            "exploration":    self.exploration,
+            "gamma":          self.gamma,
+            "rollout_greedy": self.rollout_greedy,
+        }
+
+    # Run iterations from `root` on a private copy of `env` until `deadline`
+    def search(self, env, root, deadline):
+        sim = env.clone()
+        token = sim.snapshot()
+        rollouts = 0
+        while True:
+            self.iterate(sim, token, root)
+            rollouts += 1
+            if time.perf_counter() >= deadline:
+                break
+        self.rollouts += rollouts
+        return rollouts
+
+    # One selection, expansion, rollout and backup pass
+    def iterate(self, sim, token, root):
+        rng = self.rng
+        sim.restore(token)
+        sim.rng.seed(rng.getrandbits(32))  # Fresh enemy moves for this iteration
+        node, path = root, [root]
+        total, discount = 0.0, 1.0
+        while True:
+            if len(node.children) < len(ACTIONS):
+                action = rng.choice([action for action in ACTIONS if action not in node.children])
+                chance = node.children[action] = Node()
+            else:
+                action = self.uct(node)
+                chance = node.children[action]
+            path.append(chance)
+            reward, done = self.step(sim, action)
+            total += discount * reward
+            discount *= self.gamma
+            if done:
+                break
+            key = outcome(sim)
+            node = chance.children.get(key)
+            if node is None:
+                # New situation: add it and estimate it with a rollout
+                path.append(chance.children.setdefault(key, Node()))
+                total += discount * self.rollout(sim)
+                break
+            path.append(node)
+        for node in path:
+            node.visits += 1
+            node.value += total
+
+    # Child action with the best upper confidence bound
+    def uct(self, node):
+        log_visits = math.log(node.visits)
+        exploration = self.exploration
+        best_action, best_score = None, -math.inf
+        for action, child in node.children.items():
+            score = child.value / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_action, best_score = action, score
+        return best_action
+
+    # Apply one move of the agent and the enemies; returns (reward, episode over)
+    def step(self, sim, action):
+        treasures = len(sim.treasures)
+        sim.move_agent(action)
+        move_enemies = getattr(sim, 'move_enemies', None)
+        if move_enemies is not None:
+            move_enemies()
+        left = len(sim.treasures)
+        reward = treasures - left
+        if not left:
+            return reward, True
+        if not getattr(sim, 'alive', True):
+            return reward - DEATH_PENALTY, True
+        return reward, False
+
+    # Play on with a greedy-random policy; returns the discounted return including the final distance estimate
+    def rollout(self, sim):
+        rng = self.rng
+        size = sim.size
+        cells = sim.state.cells
+        total, discount = 0.0, 1.0
+        for _ in range(self.rollout_depth):
+            # Moves that go somewhere: not off the grid, into an obstacle or a locked door, nor onto an enemy
+            blocked = (OBSTACLE, ENEMY) if getattr(sim, 'door_open', True) else (OBSTACLE, ENEMY, DOOR)
+            x, y = sim.agent_position
+            moves = []
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                nx, ny = x + dx, y + dy
+                if 0 <= nx < size and 0 <= ny < size and cells[nx * size + ny] not in blocked:
+                    moves.append((action_index, (nx, ny)))
+            if not moves:
+                action = rng.choice(ACTIONS)
+            elif rng.random() < self.rollout_greedy:
+                goal = min(sim.treasures, key=lambda treasure: manhattan((x, y), treasure))
+                action = ACTIONS[min(moves, key=lambda move: manhattan(move[1], goal))[0]]
+            else:
+                action = ACTIONS[rng.choice(moves)[0]]
+            reward, done = self.step(sim, action)
+            total += discount * reward
+            discount *= self.gamma
+            if done:
+                return total
+        start = sim.agent_position
+        distance = min(manhattan(start, treasure) for treasure in sim.treasures)
+        return total - discount * DISTANCE_WEIGHT * distance / size
+
+    # Search counters, reported by run.py
+    def stats(self):
+        return {
+            "rollouts_per_sec":      self.rollouts / self.search_time if self.search_time else 0.0,
+            "rollouts_per_decision": self.rollouts / self.decisions if self.decisions else 0.0,
+            "reused_trees":          self.reused,
+        }
+
+    # Shut the worker processes down
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+# Worker process entry point: search a fresh tree on `env` and return the root statistics
+def search_worker(env, settings, seed):
+    agent = MCTSAgent(seed=seed, **settings)
+    root = Node()
+    rollouts = agent.search(env, root, time.perf_counter() + agent.time_budget)
+    return {action: (child.visits, child.value) for action, child in root.children.items()}, rollouts
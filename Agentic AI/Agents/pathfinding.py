@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+
+# Shared grid pathfinding used by the A*, Utility-Based and Greedy agents
+
+"""
+A* search on the 4-connected grids of the environments, plus a Jump Point Search variant for uniform-cost grids
+that jumps along straight lines and only puts turning points (jump points) on the open set.
+Cells are addressed by a flat id (x * size + y) so g-scores and parent actions live in flat arrays
+that are reused between searches: a per-search stamp marks which entries are valid, so nothing is cleared.
+The open set is a binary heap with lazy deletion: improved cells are pushed again and stale entries are skipped when popped.
+Paths are returned as action strings that env.move_agent accepts directly.
+A* can also take a danger field (Agents/danger.py): within `lookahead` moves it only enters cells the enemies cannot
+reach by the time the agent gets there.
+"""
+
+import heapq  # For priority queue functionality
+from array import array  # Flat arrays indexed by cell id
+from collections import deque  # Planned actions are consumed from the front
+
+ACTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+DELTAS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+OPPOSITE = [1, 0, 3, 2]  # Index of the action that undoes UP, DOWN, LEFT, RIGHT
+BLOCKED = frozenset({'O'})  # Cell types the planners cannot enter
+
+
+# Manhattan distance, the admissible heuristic on a 4-connected grid
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+# The treasure with the smallest Manhattan distance from `start`
+def nearest_treasure(start, treasures):
+    return min(treasures, key=lambda treasure: manhattan(start, treasure))
+
+
+# Where to go once the treasures are gone: the switch while the door is locked, then the door (None without an exit)
+def exit_goal(env):
+    if getattr(env, 'exited', True):
+        return None
+    return env.door_position if env.door_open else env.switch_position
+
+
+class GridPathfinder:
+    def __init__(self, blocked=BLOCKED, search='a_star'):
+        if search not in ('a_star', 'jps'):
+            raise ValueError(f"Unknown search: {search}")
+        self.blocked = blocked
+        self.search = search
+        self.size = 0
+        self.g_score = array('i')
+        self.parent = array('b')  # Index into ACTIONS of the move that reached the cell
+        self.parent_cell = array('i')  # Jump Point Search: cell id of the previous jump point
+        self.stamp = array('I')  # Search id that last wrote the cell's g-score and parent
+        self.search_id = 0
+        self.expansions = 0  # Cells expanded by the last search
+        self.total_expansions = 0  # Cells expanded by every search so far
+
+    # (Re)allocate the buffers when the grid size changes
+    def prepare(self, size):
+        if size != self.size:
+            self.size = size
+            self.g_score = array('i', [0]) * (size * size)
+            self.parent = array('b', [-1]) * (size * size)
+            self.parent_cell = array('i', [-1]) * (size * size)
+            self.stamp = array('I', [0]) * (size * size)
+            self.search_id = 0
+        self.search_id += 1
+        return self.search_id
+
+    # Actions leading from `start` to `goal` along the parent pointers
+    def reconstruct_path(self, start, goal):
+        size = self.size
+        x, y = goal
+        path = []
+        while (x, y) != start:
+            action_index = self.parent[x * size + y]
+            path.append(ACTIONS[action_index])
+            x, y = x - DELTAS[action_index][0], y - DELTAS[action_index][1]
+        path.reverse()
+        return path
+
+    # A* from `start` to `goal`; returns the list of actions, or [] if the goal cannot be reached
+    # `blocked` overrides the planner's cell types; with `danger`, the first `lookahead` moves avoid threatened cells
+    def a_star(self, env, start, goal, blocked=None, danger=None, lookahead=0):
+        size = env.size
+        grid = env.grid
+        blocked = self.blocked if blocked is None else blocked
+        threat = danger.time_to_threat if danger is not None else None
+        if threat is None:
+            lookahead = 0
+        search_id = self.prepare(size)
+        g_score, parent, stamp = self.g_score, self.parent, self.stamp
+        goal_x, goal_y = goal
+        goal_id = goal_x * size + goal_y
+
+        start_id = start[0] * size + start[1]
+        stamp[start_id] = search_id
+        g_score[start_id] = 0
+        parent[start_id] = -1
+        # Ties on f are broken towards the larger g, so uniform open areas are crossed without expanding every equal-f cell
+        queue = [(manhattan(start, goal), 0, start_id)]
+        expansions = 0
+        while queue:
+            f, negative_g, current = heapq.heappop(queue)
+            current_g = g_score[current]
+            # Lazy deletion: skip entries superseded by a cheaper push of the same cell
+            if -negative_g > current_g:
+                continue
+            x, y = divmod(current, size)
+            expansions += 1
+            if current == goal_id:
+                self.expansions = expansions
+                self.total_expansions += expansions
+                return self.reconstruct_path(start, goal)
+            tentative_g = current_g + 1
+            for action_index, (dx, dy) in enumerate(DELTAS):
+                nx, ny = x + dx, y + dy
+                if not (0 <= nx < size and 0 <= ny < size) or grid[nx][ny] in blocked:
+                    continue
+                neighbor = nx * size + ny
+                if tentative_g <= lookahead and threat[neighbor] <= tentative_g:
+                    continue  # An enemy could be there by then
+                if stamp[neighbor] != search_id or tentative_g < g_score[neighbor]:
+                    stamp[neighbor] = search_id
+                    g_score[neighbor] = tentative_g
+                    parent[neighbor] = action_index
+                    heapq.heappush(queue, (tentative_g + abs(nx - goal_x) + abs(ny - goal_y), -tentative_g, neighbor))
+        self.expansions = expansions
+        self.total_expansions += expansions
+        return []
+
+    # Path from `start` to `goal` with the configured search (A* whenever blocked cells or a danger field are given)
+    def find_path(self, env, start, goal, blocked=None, danger=None, lookahead=0):
+        if blocked is not None or danger is not None:
+            return self.a_star(env, start, goal, blocked, danger, lookahead)
+        if self.search == 'jps':
+            return self.jump_point_search(env, start, goal)
+        return self.a_star(env, start, goal)
+
+    # Jump Point Search on a 4-connected uniform-cost grid; returns the same path lengths as a_star
+    # Moving along rows (UP/DOWN) stops where a side cell opens up behind an obstacle;
+    # moving along columns (LEFT/RIGHT) additionally stops wherever a row jump from the cell finds a jump point
+    def jump_point_search(self, env, start, goal):
+        size = env.size
+        grid = env.grid
+        blocked = self.blocked
+        search_id = self.prepare(size)
+        g_score, parent_cell, stamp = self.g_score, self.parent_cell, self.stamp
+        goal_x, goal_y = goal
+
+        def walkable(x, y):
+            return 0 <= x < size and 0 <= y < size and grid[x][y] not in blocked
+
+        def jump_rows(x, y, dx):
+            while True:
+                x += dx
+                if not walkable(x, y):
+                    return None
+                if x == goal_x and y == goal_y:
+                    return x, y
+                if (walkable(x, y - 1) and not walkable(x - dx, y - 1)) or (walkable(x, y + 1) and not walkable(x - dx, y + 1)):
+                    return x, y
+
+        def jump_columns(x, y, dy):
+            while True:
+                y += dy
+                if not walkable(x, y):
+                    return None
+                if x == goal_x and y == goal_y:
+                    return x, y
+                if (walkable(x - 1, y) and not walkable(x - 1, y - dy)) or (walkable(x + 1, y) and not walkable(x + 1, y - dy)):
+                    return x, y
+                if jump_rows(x, y, 1) is not None or jump_rows(x, y, -1) is not None:
+                    return x, y
+
+        start_id = start[0] * size + start[1]
+        stamp[start_id] = search_id
+        g_score[start_id] = 0
+        parent_cell[start_id] = -1
+        queue = [(manhattan(start, goal), 0, start_id)]
+        expansions = 0
+        while queue:
+            f, negative_g, current = heapq.heappop(queue)
+            current_g = g_score[current]
+            if -negative_g > current_g:
+                continue
+            expansions += 1
+            x, y = divmod(current, size)
+            if x == goal_x and y == goal_y:
+                self.expansions = expansions
+                self.total_expansions += expansions
+                return self.reconstruct_jumps(start, goal)
+
+            # Prune the directions: never straight back towards the previous jump point
+            previous = parent_cell[current]
+            if previous < 0:
+                directions = DELTAS
+            else:
+                px, py = divmod(previous, size)
+                dx, dy = (x > px) - (x < px), (y > py) - (y < py)
+                directions = [(ddx, ddy) for ddx, ddy in DELTAS if (ddx, ddy) != (-dx, -dy)]
+            for ddx, ddy in directions:
+                if ddx:
+                    jump_point = jump_rows(x, y, ddx)
+                else:
+                    jump_point = jump_columns(x, y, ddy)
+                if jump_point is None:
+                    continue
+                jx, jy = jump_point
+                neighbor = jx * size + jy
+                tentative_g = current_g + abs(jx - x) + abs(jy - y)
+                if stamp[neighbor] != search_id or tentative_g < g_score[neighbor]:
+                    stamp[neighbor] = search_id
+                    g_score[neighbor] = tentative_g
+                    parent_cell[neighbor] = current
+                    heapq.heappush(queue, (tentative_g + abs(jx - goal_x) + abs(jy - goal_y), -tentative_g, neighbor))
+        self.expansions = expansions
+        self.total_expansions += expansions
+        return []
+
+    # Actions from `start` to `goal`, expanding the straight segments between jump points
+    def reconstruct_jumps(self, start, goal):
+        size = self.size
+        x, y = goal
+        path = []
+        while (x, y) != start:
+            px, py = divmod(self.parent_cell[x * size + y], size)
+            if x != px:
+                path.extend(['DOWN' if x > px else 'UP'] * abs(x - px))
+            else:
+                path.extend(['RIGHT' if y > py else 'LEFT'] * abs(y - py))
+            x, y = px, py
+        path.reverse()
+        return path
+
+
+# Planning agents built on the shared pathfinder: follow a path to the Manhattan-nearest treasure, replan when it runs out
+# With use_distance_cache the path to the BFS-nearest treasure is read from the shared distance oracle instead,
+# so agents and episodes playing the same map only pay for each BFS once; search='jps' plans with Jump Point Search
+# With avoid_enemies the agent also treats enemies and the locked door as blocked, keeps its first `lookahead` moves out
+# of the enemies' reach (Agents/danger.py) and replans as soon as the path ahead is no longer safe; once the treasures
+# of a puzzle are collected it heads for the switch while the door is locked, then out through the door
+class PathFollowingAgent:
+    def __init__(self, use_distance_cache=False, search='a_star', avoid_enemies=False, lookahead=2):
+        self.path = deque()
+        self.planner = GridPathfinder(search=search)
+        self.use_distance_cache = use_distance_cache
+        self.oracle_grid = None  # Grid the oracle was looked up for
+        self.oracle = None
+        self.avoid_enemies = avoid_enemies
+        self.lookahead = lookahead
+        self.danger = None
+
+    # Selects an action based on the current environment
+    def select_action(self, env):
+        if self.avoid_enemies and hasattr(env, 'enemies'):
+            return self.select_safe_action(env)
+        if not self.path:
+            if not env.treasures:
+                return 'No Treasures left'
+            self.path = deque(self.find_path_to_nearest_treasure(env))
+        if self.path:
+            return self.path.popleft()
+        else:
+            return 'No Treasures left'
+
+    # Finds the path to the nearest treasure
+    def find_path_to_nearest_treasure(self, env):
+        start = env.agent_position
+        if self.use_distance_cache:
+            if env.grid is not self.oracle_grid:
+                from Agents.distancecache import get_oracle  # Imported here, distancecache builds on this module
+                self.oracle_grid, self.oracle = env.grid, get_oracle(env)
+            goal = self.oracle.nearest(start, env.treasures)
+            return self.oracle.path(start, goal) if goal is not None else []
+        return self.planner.find_path(env, start, nearest_treasure(start, env.treasures))
+
+    # Path following that keeps clear of the enemies and the locked door
+    def select_safe_action(self, env):
+        goal = None
+        if not env.treasures:
+            goal = exit_goal(env)
+            if goal is None:
+                return 'No Treasures left'
+        from Agents.danger import DangerField, blocked_types  # Imported here, danger builds on this module
+        if self.danger is None:
+            self.danger = DangerField(horizon=self.lookahead + 1)
+        danger = self.danger.update(env)
+        blocked = blocked_types(env)
+        if not self.path_is_safe(env, blocked):
+            start = env.agent_position
+            if goal is None:
+                goal = nearest_treasure(start, env.treasures)
+            self.path = deque(self.planner.a_star(env, start, goal, blocked, danger, self.lookahead))
+            if not self.path and env.treasures:
+                # The nearest treasure is cut off; try the others, nearest first, then the switch of a locked door
+                goals = sorted(env.treasures, key=lambda treasure: manhattan(start, treasure))[1:]
+                if not getattr(env, 'door_open', True):
+                    goals.append(env.switch_position)
+                for goal in goals:
+                    self.path = deque(self.planner.a_star(env, start, goal, blocked, danger, self.lookahead))
+                    if self.path:
+                        break
+        if self.path:
+            return self.path.popleft()
+        return self.evade(env, blocked)
+
+    # Whether the next `lookahead` moves of the cached path are still open and out of the enemies' reach
+    def path_is_safe(self, env, blocked):
+        if not self.path:
+            return False
+        grid = env.grid
+        x, y = env.agent_position
+        for moves, action in enumerate(self.path, 1):
+            if moves > self.lookahead:
+                break
+            dx, dy = DELTAS[ACTIONS.index(action)]
+            x, y = x + dx, y + dy
+            if grid[x][y] in blocked or not self.danger.safe_at((x, y), moves):
+                return False
+        return True
+
+    # No safe path: step to the open neighbor the enemies need longest to reach
+    def evade(self, env, blocked):
+        size = env.size
+        grid = env.grid
+        x, y = env.agent_position
+        best_action, best_threat = None, -1
+        for action, (dx, dy) in zip(ACTIONS, DELTAS):
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < size and 0 <= ny < size and grid[nx][ny] not in blocked:
+                threat = self.danger.threat((nx, ny))
+                if threat > best_threat:
+                    best_action, best_threat = action, threat
+        return best_action if best_action is not None else 'No Treasures left'
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+
+# Q-table backends shared by the Q-Learning, SARSA and Learning agents
+
+"""
+Two interchangeable Q-tables indexed by (x, y) states and action indices (ACTIONS order):
+DictQTable is the original dict of position -> [UP, DOWN, LEFT, RIGHT] values, created on first use of a state.
+DenseQTable keeps every state in one float32 array of shape (size, size, 4). Single lookups and updates go through a
+flat memoryview of that array, so they neither allocate lists nor pay NumPy's per-call overhead, while batches of
+transitions are selected and updated with vectorized NumPy operations on the same memory.
+The dense table grows when it sees a state outside its grid, so it can be created before the grid size is known.
+TabularAgent holds what the tabular learners share (table, epsilon-greedy selection, batch updates); each learner
+only adds its own single-transition update, and SARSA its own batch target.
+"""
+
+import random  # Epsilon-greedy exploration and the seed of the batch generator
+import numpy as np  # Dense table storage and batch updates
+from Agents.pathfinding import ACTIONS
+
+ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+
+
+class DictQTable(dict):
+    # Values of a state, created as zeros on first use
+    def values_of(self, state):
+        values = self.get(state)
+        if values is None:
+            values = self[state] = [0, 0, 0, 0]
+        return values
+
+    # Index of the first action with the highest value
+    def best_action(self, state):
+        values = self.values_of(state)
+        return values.index(max(values))
+
+    def value(self, state, action_index):
+        return self.values_of(state)[action_index]
+
+    def max_value(self, state):
+        return max(self.values_of(state))
+
+    # Q(s, a) += alpha * (reward + gamma * max Q(s', .) - Q(s, a))
+    def q_learning_update(self, state, action_index, reward, next_state, alpha, gamma):
+        values = self.get(state)
+        if values is None:
+            values = self[state] = [0, 0, 0, 0]
+        next_values = self.get(next_state)
+        if next_values is None:
+            next_values = self[next_state] = [0, 0, 0, 0]
+        values[action_index] += alpha * (reward + gamma * max(next_values) - values[action_index])
+
+    # Q(s, a) += alpha * (reward + gamma * Q(s', a') - Q(s, a))
+    def sarsa_update(self, state, action_index, reward, next_state, next_action_index, alpha, gamma):
+        values = self.get(state)
+        if values is None:
+            values = self[state] = [0, 0, 0, 0]
+        next_values = self.get(next_state)
+        if next_values is None:
+            next_values = self[next_state] = [0, 0, 0, 0]
+        values[action_index] += alpha * (reward + gamma * next_values[next_action_index] - values[action_index])
+
+    def display(self):
+        for state, q_values in self.items():
+            print(f"State: {state}, Q-values: {q_values}")
+
+
+class DenseQTable:
+    def __init__(self, size=0):
+        self.allocate(size)
+
+    # Fresh zero table for a size x size grid
+    def allocate(self, size):
+        self.size = size
+        self.q = np.zeros((size, size, len(ACTIONS)), dtype=np.float32)
+        self.flat = memoryview(self.q.reshape(-1))  # Same memory, indexed by (x * size + y) * 4 + action
+        self.seen = bytearray(size * size)  # 1 for states used so far (for display), by x * size + y
+        self.visited = np.frombuffer(self.seen, dtype=np.uint8).reshape(size, size)  # Same memory, for batches
+
+    # Grow (keeping the values) so that `state` fits
+    def fit(self, state):
+        x, y = state
+        if x >= self.size or y >= self.size:
+            old_q, old_visited, old_size = self.q, self.visited, self.size
+            self.allocate(max(x, y) + 1)
+            self.q[:old_size, :old_size] = old_q
+            self.visited[:old_size, :old_size] = old_visited
+
+    # Grow so that every row of an (N, 2) state array fits
+    def fit_batch(self, states):
+        if len(states):
+            self.fit((int(states[:, 0].max()), int(states[:, 1].max())))
+
+    # Offset of the state's first action value in the flat view, marking the state as used
+    def offset(self, state):
+        x, y = state
+        size = self.size
+        if x >= size or y >= size:
+            self.fit(state)
+            size = self.size
+        cell = x * size + y
+        self.seen[cell] = 1
+        return cell << 2
+
+    # Index of the first action with the highest value
+    def best_action(self, state):
+        base = self.offset(state)
+        flat = self.flat
+        best_index, best_value = 0, flat[base]
+        for action_index in (1, 2, 3):
+            if flat[base + action_index] > best_value:
+                best_index, best_value = action_index, flat[base + action_index]
+        return best_index
+
+    def value(self, state, action_index):
+        return self.flat[self.offset(state) + action_index]
+
+    def max_value(self, state):
+        base = self.offset(state)
+        flat = self.flat
+        return max(flat[base], flat[base + 1], flat[base + 2], flat[base + 3])
+
+    # Q(s, a) += alpha * (reward + gamma * max Q(s', .) - Q(s, a))
+    def q_learning_update(self, state, action_index, reward, next_state, alpha, gamma):
+        x, y = state
+        next_x, next_y = next_state
+        size = self.size
+        if x >= size or y >= size or next_x >= size or next_y >= size:
+            self.fit((max(x, next_x), max(y, next_y)))
+            size = self.size
+        cell, next_cell = x * size + y, next_x * size + next_y
+        seen = self.seen
+        seen[cell] = seen[next_cell] = 1
+        flat = self.flat
+        index, base = (cell << 2) + action_index, next_cell << 2
+        best_next = max(flat[base], flat[base + 1], flat[base + 2], flat[base + 3])
+        flat[index] += alpha * (reward + gamma * best_next - flat[index])
+
+    # Q(s, a) += alpha * (reward + gamma * Q(s', a') - Q(s, a))
+    def sarsa_update(self, state, action_index, reward, next_state, next_action_index, alpha, gamma):
+        # Grow for both states first: growing reallocates the table, which would move an offset taken before
+        x, y = state
+        next_x, next_y = next_state
+        if x >= self.size or y >= self.size or next_x >= self.size or next_y >= self.size:
+            self.fit((max(x, next_x), max(y, next_y)))
+        index = self.offset(state) + action_index
+        next_index = self.offset(next_state) + next_action_index
+        flat = self.flat
+        flat[index] += alpha * (reward + gamma * flat[next_index] - flat[index])
+
+    # Greedy action indices for arrays of states (first highest value on ties, like best_action)
+    def best_actions(self, xs, ys):
+        self.visited[xs, ys] = 1
+        return self.q[xs, ys].argmax(axis=1)
+
+    def max_values(self, xs, ys):
+        self.visited[xs, ys] = 1
+        return self.q[xs, ys].max(axis=1)
+
+    def values(self, xs, ys, action_indices):
+        self.visited[xs, ys] = 1
+        return self.q[xs, ys, action_indices]
+
+    # Add deltas to (state, action) entries; repeated entries add up instead of overwriting each other
+    def add_batch(self, xs, ys, action_indices, deltas):
+        np.add.at(self.q, (xs, ys, action_indices), deltas)
+
+    # Add the mean of the deltas of each repeated (state, action) entry, so k copies of a pair move it once, not k times
+    def add_mean_batch(self, xs, ys, action_indices, deltas):
+        _, inverse, counts = np.unique((xs * self.size + ys) * 4 + action_indices, return_inverse=True,
+                                       return_counts=True)
+        self.add_batch(xs, ys, action_indices, (deltas / counts[inverse]).astype(np.float32))
+
+    # Dict-style access to one state's values (a view into the table)
+    def __getitem__(self, state):
+        self.offset(state)
+        return self.q[state[0], state[1]]
+
+    def __contains__(self, state):
+        x, y = state
+        return 0 <= x < self.size and 0 <= y < self.size and self.seen[x * self.size + y] == 1
+
+    def __len__(self):
+        return self.seen.count(1)
+
+    def items(self):
+        for x, y in zip(*np.nonzero(self.visited)):
+            yield (int(x), int(y)), self.q[x, y].tolist()
+
+    def display(self):
+        for state, q_values in self.items():
+            print(f"State: {state}, Q-values: {q_values}")
+
+
+# Empty Q-table of the requested backend ('dict' or 'dense')
+def make_q_table(backend='dict', size=0):
+    if backend == 'dict':
+        return DictQTable()
+    if backend == 'dense':
+        return DenseQTable(size)
+    raise ValueError(f"Unknown Q-table backend: {backend}")
+
+
+# Epsilon-greedy action indices for an (N, 2) array of states on a dense table
+def epsilon_greedy_batch(table, states, epsilon, rng):
+    states = np.asarray(states)
+    xs, ys = states[:, 0], states[:, 1]
+    table.fit_batch(states)
+    actions = table.best_actions(xs, ys)
+    explore = rng.random(len(states)) < epsilon
+    actions[explore] = rng.integers(0, len(ACTIONS), int(explore.sum()))
+    return actions
+
+
+# Move Q(state, action) towards `targets` by `alpha` for a batch; every TD error is taken from the table before the batch
+# and a pair that appears several times moves by the mean of its steps
+def td_update_batch(table, states, action_indices, targets, alpha):
+    states = np.asarray(states)
+    xs, ys = states[:, 0], states[:, 1]
+    action_indices = np.asarray(action_indices)
+    table.fit_batch(states)
+    current = table.values(xs, ys, action_indices)
+    table.add_mean_batch(xs, ys, action_indices, alpha * (targets - current))
+
+
+class TabularAgent:
+    def __init__(self, q_backend='dict', size=0):
+        # q_backend='dense' keeps the Q-values in a float32 (size, size, 4) array
+        self.q_backend = q_backend
+        self.size = size
+        self.q_table = make_q_table(q_backend, size)
+        self.alpha = 0.1  # Learning rate
+        self.gamma = 0.9  # Discount factor
+        self.epsilon = 0.1  # Exploration rate
+        self.np_rng = None  # NumPy generator for batch action selection, created on first use
+
+    # Selects an action based on the current environment
+    def select_action(self, env):
+        if random.random() < self.epsilon:
+            return random.choice(ACTIONS)
+        else:
+            return ACTIONS[self.q_table.best_action(env.agent_position)]
+    # Selects action indices for an (N, 2) array of states at once (dense backend)
+    def select_actions(self, states):
+        if self.np_rng is None:
+            self.np_rng = np.random.default_rng(random.getrandbits(32))
+        return epsilon_greedy_batch(self.dense_table(), states, self.epsilon, self.np_rng)
+    # Updates the Q-table for a batch of transitions at once (dense backend), Q-learning target; actions are indices
+    def update_batch(self, states, action_indices, rewards, next_states, dones=None):
+        table = self.dense_table()
+        next_states = np.asarray(next_states)
+        table.fit_batch(next_states)
+        self.apply_batch(states, action_indices, rewards, table.max_values(next_states[:, 0], next_states[:, 1]), dones)
+    # Moves the batch towards reward + gamma * next value; nothing is bootstrapped past a `done` transition
+    def apply_batch(self, states, action_indices, rewards, next_values, dones=None):
+        if dones is not None:
+            next_values = np.where(dones, 0.0, next_values)
+        td_update_batch(self.dense_table(), states, action_indices, np.asarray(rewards) + self.gamma * next_values,
+                        self.alpha)
+    # The Q-table, which must be dense for batch operations
+    def dense_table(self):
+        if self.q_backend != 'dense':
+            raise ValueError("Batch operations need q_backend='dense'")
+        return self.q_table
+    # Resets the Q-table
+    def reset_q_table(self):
+        self.q_table = make_q_table(self.q_backend, self.size)
+    # Displays the Q-table
+    def display_q_table(self):
+        self.q_table.display()
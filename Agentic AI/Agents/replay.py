@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+# Experience replay for the tabular learners: a NumPy ring buffer with uniform or prioritized sampling
+
+"""
+Transitions (state, action, reward, next_state, done) are stored in one preallocated structured array used as a ring
+buffer, so adding a transition writes one row and never allocates. Minibatches are drawn uniformly or, with
+prioritized=True, in proportion to priority ** alpha, where a transition's priority is its last absolute TD error.
+Newly added transitions get the highest priority seen so far, so each is replayed at least once soon after it happened.
+Priorities live in a sum tree (SumTree), so drawing a batch or changing priorities costs O(batch * log capacity) in a
+few vectorized passes over the tree levels, rather than a cumulative sum over the whole buffer per batch.
+Prioritized samples come with importance-sampling weights (N * P(i)) ** -beta, normalized by their maximum.
+replay_update applies a minibatch to a dense Q-table (Agents/qtable.py) with one vectorized scatter-add, using the
+Q-learning target reward + gamma * max Q(next_state, .), which stays valid for old transitions because it does not
+depend on the policy that produced them. A pair drawn several times in one batch gets the mean of its updates.
+replay() waits until the buffer holds a full batch.
+"""
+
+import numpy as np  # Ring buffer storage, sampling and batch updates
+from Agents.qtable import ACTION_INDEX
+
+TRANSITION = np.dtype([
+    ('state',      np.int32, (2,)),
+    ('action',     np.int8),
+    ('reward',     np.float32),
+    ('next_state', np.int32, (2,)),
+    ('done',       np.bool_),
+])
+
+
+class SumTree:
+    # Binary tree of priority sums in one array: node i has children 2i and 2i + 1, the leaves start at `leaves`
+    def __init__(self, capacity):
+        self.depth = max(0, capacity - 1).bit_length()
+        self.leaves = 1 << self.depth
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    def total(self):
+        return self.tree[1]
+
+    def get(self, indices):
+        return self.tree[self.leaves + indices]
+
+    # Set one leaf and fix the sums above it
+    def set(self, index, value):
+        tree = self.tree
+        node = self.leaves + index
+        tree[node] = value
+        node >>= 1
+        while node:
+            tree[node] = tree[2 * node] + tree[2 * node + 1]
+            node >>= 1
+
+    # Set many leaves, then fix the sums one level at a time (repeated parents get the same sum)
+    def set_batch(self, indices, values):
+        tree = self.tree
+        nodes = self.leaves + np.asarray(indices, dtype=np.intp)
+        tree[nodes] = values
+        for _ in range(self.depth):
+            nodes >>= 1
+            left = nodes << 1
+            tree[nodes] = tree.take(left) + tree.take(left + 1)
+
+    # Leaf index for each prefix-sum value in [0, total): walk down, going right past the left subtree's sum
+    def find(self, values):
+        tree = self.tree
+        nodes = np.ones(len(values), dtype=np.intp)
+        values = values.copy()
+        for _ in range(self.depth):
+            nodes <<= 1
+            left = tree.take(nodes)
+            right = values >= left
+            np.subtract(values, left, out=values, where=right)
+            nodes += right
+        return nodes - self.leaves
+
+
+class ReplayBuffer:
+    def __init__(self, capacity=100000, prioritized=False, alpha=0.6, beta=0.4, min_priority=1e-3, seed=None):
+        self.capacity = capacity
+        self.prioritized = prioritized
+        self.alpha = alpha  # How strongly priorities shape sampling (0 = uniform)
+        self.beta = beta  # How strongly importance weights correct for it (1 = fully)
+        self.min_priority = min_priority  # Keeps transitions with a zero TD error sampleable
+        self.rng = np.random.default_rng(seed)
+        self.data = np.zeros(capacity, dtype=TRANSITION)
+        self.priorities = SumTree(capacity) if prioritized else None  # Already raised to alpha
+        self.max_priority = 1.0  # Highest priority so far (raised to alpha), given to new transitions
+        self.position = 0  # Next row to write
+        self.count = 0  # Rows holding a transition
+
+    def __len__(self):
+        return self.count
+
+    # Store one transition; the action can be a name from ACTIONS or its index
+    def add(self, state, action, reward, next_state, done=False):
+        position = self.position
+        self.data[position] = (state, ACTION_INDEX.get(action, action), reward, next_state, done)
+        if self.priorities is not None:
+            self.priorities.set(position, self.max_priority)
+        self.position = (position + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    # Store a batch of transitions given as arrays (actions as indices)
+    def add_batch(self, states, action_indices, rewards, next_states, dones=None):
+        n = len(rewards)
+        if n > self.capacity:
+            # Only the newest transitions fit
+            skip = n - self.capacity
+            states, action_indices, rewards, next_states = \
+                states[skip:], action_indices[skip:], rewards[skip:], next_states[skip:]
+            dones = None if dones is None else dones[skip:]
+            n = self.capacity
+        rows = (self.position + np.arange(n)) % self.capacity
+        data = self.data
+        data['state'][rows] = states
+        data['action'][rows] = action_indices
+        data['reward'][rows] = rewards
+        data['next_state'][rows] = next_states
+        data['done'][rows] = False if dones is None else dones
+        if self.priorities is not None:
+            self.priorities.set_batch(rows, self.max_priority)
+        self.position = (self.position + n) % self.capacity
+        self.count = min(self.capacity, self.count + n)
+
+    # Draw `batch_size` transitions with replacement; returns (batch, row indices, importance weights)
+    def sample(self, batch_size):
+        count = self.count
+        if not count:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        if self.priorities is None:
+            indices = self.rng.integers(0, count, batch_size)
+            return self.data[indices], indices, np.ones(batch_size, dtype=np.float32)
+        total = self.priorities.total()
+        indices = self.priorities.find(self.rng.random(batch_size) * total)
+        np.minimum(indices, count - 1, out=indices)  # Guards against rounding at the top end
+        weights = (count * self.priorities.get(indices) / total) ** -self.beta
+        weights /= weights.max()
+        return self.data[indices], indices, weights.astype(np.float32)
+
+    # New priorities for sampled rows from their absolute TD errors
+    def update_priorities(self, indices, td_errors):
+        if self.priorities is None:
+            return
+        priorities = (np.abs(td_errors) + self.min_priority) ** self.alpha
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.priorities.set_batch(indices, priorities)
+
+
+# Apply a minibatch to a dense Q-table with the Q-learning target; returns the TD errors before the update
+def replay_update(table, batch, alpha, gamma, weights=None):
+    states, next_states = batch['state'], batch['next_state']
+    table.fit_batch(np.maximum(states, next_states))
+    xs, ys, actions = states[:, 0], states[:, 1], batch['action'].astype(np.intp)
+    best_next = table.max_values(next_states[:, 0], next_states[:, 1])
+    targets = batch['reward'] + np.where(batch['done'], 0.0, gamma * best_next)
+    td_errors = targets - table.values(xs, ys, actions)
+    steps = alpha * td_errors if weights is None else alpha * weights * td_errors
+    # A (state, action) pair drawn k times gets the mean of its k updates, not their sum, which would overshoot
+    table.add_mean_batch(xs, ys, actions, steps)
+    return td_errors
+
+
+# Sample a minibatch from `buffer` and apply it to the agent's dense Q-table, updating priorities when used
+# Nothing is replayed before the buffer holds a full batch; returns the TD errors, or None when skipped
+def replay(agent, buffer, batch_size=64):
+    if len(buffer) < batch_size:
+        return None
+    batch, indices, weights = buffer.sample(batch_size)
+    td_errors = replay_update(agent.dense_table(), batch, agent.alpha, agent.gamma,
+                              weights if buffer.prioritized else None)
+    buffer.update_priorities(indices, td_errors)
+    return td_errors
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+
+# Value-Iteration Agent solves a fixed TreasureHunting map exactly and follows the optimal policy table
+
+"""
+With the map fixed, TreasureHunting is a small deterministic MDP: the state is the agent's cell plus a bitmask of the
+treasures not collected yet (bit i = the i-th placed treasure). Moves follow the environment's rules (leaving the grid
+or walking into an obstacle keeps the agent in place), entering a cell whose treasure is still there pays 1 and
+clears its bit, and the state with no treasures left is terminal.
+TreasureMDP builds that transition structure as NumPy arrays - for every action, the flat index of the next
+(mask, cell) state and the reward, for all states at once - and solves it with vectorized value iteration or policy
+iteration. The result is a policy table of shape (2 ** treasures, cells), so serving an action is one lookup.
+Values are exact discounted returns, which makes the solver a ground-truth baseline for the learning agents: the
+optimal value of the start state bounds what any of them can reach. The discount makes early treasures worth more, so
+the optimal tour can be a few steps longer than the shortest one (see Agents/tourplanner.py).
+Enemies and the switch/door of PuzzleWithEnemies are not modelled; the agent follows the same table there.
+A map with more (mask, cell) states than max_states is too big to solve exactly; the agent then hands it to the
+Tour-Planning Agent (Agents/tourplanner.py) instead of failing.
+The mask of remaining treasures is kept between steps and only the treasure under the agent is checked; the grid is
+scanned again only when the treasure count disagrees with the mask (a snapshot was restored, or several moves passed).
+"""
+
+import numpy as np  # Transition arrays, values and the policy table
+from Agents.pathfinding import ACTIONS, DELTAS
+from Agents.distancecache import obstacle_mask
+from Agents.tourplanner import TourPlanningAgent  # Planner for maps with too many states
+from Environments.gridstate import TREASURE
+
+MAX_STATES = 2_000_000  # (mask, cell) states solved at most, about 50 bytes each while solving
+
+
+class TreasureMDP:
+    def __init__(self, size, blocked, treasure_ids, gamma=0.95, max_states=MAX_STATES):
+        cells = size * size
+        masks = 1 << len(treasure_ids)
+        if masks * cells > max_states:
+            raise ValueError(f"{len(treasure_ids)} treasures on a {size}x{size} grid give {masks * cells:,} states, "
+                             f"more than max_states={max_states:,}")
+        self.size = size
+        self.cells = cells
+        self.masks = masks
+        self.gamma = gamma
+        self.treasure_ids = list(treasure_ids)
+
+        # Next cell for every (cell, action), following the environment's movement rules
+        ids = np.arange(cells)
+        xs, ys = np.divmod(ids, size)
+        blocked = np.frombuffer(blocked, dtype=np.uint8).astype(bool)
+        next_cell = np.empty((len(ACTIONS), cells), dtype=np.int64)
+        for action_index, (dx, dy) in enumerate(DELTAS):
+            nx, ny = xs + dx, ys + dy
+            inside = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+            target = np.where(inside, nx * size + ny, ids)
+            next_cell[action_index] = np.where(blocked[target], ids, target)
+
+        # Treasure bit of every cell (0 for cells without one)
+        bit = np.zeros(cells, dtype=np.int64)
+        for index, cell_id in enumerate(self.treasure_ids):
+            bit[cell_id] = 1 << index
+
+        # For every action and state (mask * cells + cell): the next state and the reward
+        mask_column = np.arange(masks, dtype=np.int64)[:, None]
+        self.next_state = np.empty((len(ACTIONS), masks * cells), dtype=np.int32)
+        self.reward = np.empty((len(ACTIONS), masks * cells), dtype=np.float32)
+        for action_index in range(len(ACTIONS)):
+            collected = mask_column & bit[next_cell[action_index]][None, :]
+            self.next_state[action_index] = ((mask_column ^ collected) * cells + next_cell[action_index]).ravel()
+            self.reward[action_index] = (collected != 0).ravel()
+        self.values = None
+        self.policy = None
+        self.sweeps = 0
+
+    # Q-values of every state for every action under the state values `values`
+    def q_values(self, values):
+        q = self.reward + self.gamma * values[self.next_state]
+        q[:, :self.cells] = 0.0  # Mask 0: every treasure collected, terminal
+        return q
+
+    # Vectorized value iteration until no value changes by more than `tolerance`
+    def value_iteration(self, tolerance=1e-6, max_sweeps=100000):
+        values = np.zeros(self.masks * self.cells, dtype=np.float32)
+        for sweep in range(1, max_sweeps + 1):
+            q = self.q_values(values)
+            new_values = q.max(axis=0)
+            change = np.abs(new_values - values).max()
+            values = new_values
+            if change <= tolerance:
+                break
+        self.sweeps = sweep
+        self.values = values
+        self.policy = self.q_values(values).argmax(axis=0).astype(np.uint8)
+        return self.policy
+
+    # Policy iteration: evaluate the current policy by repeated sweeps, then act greedily on it, until stable
+    def policy_iteration(self, tolerance=1e-6, max_sweeps=100000):
+        states = np.arange(self.masks * self.cells)
+        policy = np.zeros(self.masks * self.cells, dtype=np.uint8)
+        values = np.zeros(self.masks * self.cells, dtype=np.float32)
+        self.sweeps = 0
+        while self.sweeps < max_sweeps:
+            next_state = self.next_state[policy, states]
+            reward = self.reward[policy, states]
+            reward[:self.cells] = 0.0
+            for _ in range(max_sweeps):
+                new_values = reward + self.gamma * values[next_state]
+                new_values[:self.cells] = 0.0
+                self.sweeps += 1
+                change = np.abs(new_values - values).max()
+                values = new_values
+                if change <= tolerance:
+                    break
+            q = self.q_values(values)
+            # Keep the current action on ties, so the loop ends instead of cycling between equal actions
+            best = q.max(axis=0)
+            new_policy = np.where(q[policy, states] >= best - tolerance, policy, q.argmax(axis=0)).astype(np.uint8)
+            if np.array_equal(new_policy, policy):
+                break
+            policy = new_policy
+        self.values = values
+        self.policy = policy
+        return policy
+
+    # Index of a state
+    def state(self, position, mask):
+        return mask * self.cells + position[0] * self.size + position[1]
+
+    # Steps the policy takes to collect every treasure in `mask` from `position` (None if some are unreachable)
+    def steps_to_collect(self, position, mask):
+        state = self.state(position, mask)
+        policy = self.policy
+        for steps in range(self.masks * self.cells + 1):
+            if state < self.cells:
+                return steps
+            state = self.next_state[policy[state], state]
+        return None
+
+
+# Bitmask of the treasures still on the grid, by placement order
+def remaining_mask(env):
+    cells = env.state.cells
+    mask = 0
+    for index, cell_id in enumerate(env.state.treasure_ids):
+        if cells[cell_id] == TREASURE:
+            mask |= 1 << index
+    return mask
+
+
+# Solve the current map of `env` ('value' or 'policy' iteration)
+def solve(env, gamma=0.95, method='value', max_states=MAX_STATES):
+    mdp = TreasureMDP(env.size, obstacle_mask(env), env.state.treasure_ids, gamma, max_states)
+    if method == 'value':
+        mdp.value_iteration()
+    elif method == 'policy':
+        mdp.policy_iteration()
+    else:
+        raise ValueError(f"Unknown solver method: {method}")
+    return mdp
+
+
+class ValueIterationAgent:
+    def __init__(self, gamma=0.95, method='value', max_states=MAX_STATES):
+        self.gamma = gamma  # Discount, so shorter tours score higher
+        self.method = method
+        self.max_states = max_states
+        self.mdp = None
+        self.treasure_ids = None  # Layout the policy was solved for
+        self.solves = 0
+        self.fallback = None  # TourPlanningAgent while the map is too big to solve
+        self.fallbacks = 0
+        self.bits = {}  # Treasure cell id -> its bit in the mask
+        self.mask = 0  # Treasures not collected yet, as of the last step
+        self.mask_count = 0  # Bits set in `mask`
+
+    # Selects an action based on the current environment
+    def select_action(self, env):
+        if not env.treasures:
+            return 'No Treasures left'
+        # A new map lays out new treasures (restoring a snapshot keeps the same id array)
+        if env.state.treasure_ids is not self.treasure_ids:
+            self.treasure_ids = env.state.treasure_ids
+            self.bits = {cell_id: 1 << index for index, cell_id in enumerate(self.treasure_ids)}
+            self.rescan(env)
+            if (1 << len(self.treasure_ids)) * env.size * env.size > self.max_states:
+                self.mdp = None
+                self.fallback = TourPlanningAgent()
+                self.fallbacks += 1
+            else:
+                self.mdp = solve(env, self.gamma, self.method, self.max_states)
+                self.fallback = None
+                self.solves += 1
+        if self.fallback is not None:
+            return self.fallback.select_action(env)
+        return ACTIONS[self.mdp.policy[self.mdp.state(env.agent_position, self.current_mask(env))]]
+
+    # Mask of the remaining treasures: only the treasure under the agent can have gone since the last step
+    def current_mask(self, env):
+        x, y = env.agent_position
+        cell_id = x * env.size + y
+        bit = self.bits.get(cell_id, 0)
+        if self.mask & bit and env.state.cells[cell_id] != TREASURE:
+            self.mask ^= bit
+            self.mask_count -= 1
+        if self.mask_count != env.state.treasure_count:
+            self.rescan(env)
+        return self.mask
+
+    def rescan(self, env):
+        self.mask = remaining_mask(env)
+        self.mask_count = bin(self.mask).count('1')
+
+    # Solver counters, reported by run.py
+    def stats(self):
+        mdp = self.mdp
+        return {
+            "states": mdp.masks * mdp.cells if mdp else 0,
+            "sweeps": mdp.sweeps if mdp else 0,
+            "solves": self.solves,
+            "fallbacks": self.fallbacks,
+        }
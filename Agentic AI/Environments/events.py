@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import json  # JSON Lines output
+from collections import Counter, deque  # Event counts and the bounded ring buffer
+
+"""
+Event sinks for environment events (treasures, switch, door, deaths).
+Environments call `sink.emit(kind, message, **fields)` instead of printing, so bulk simulations
+can choose how much they pay for each event: print it, keep the last N, write JSON Lines, only count, or drop it.
+"""
+
+
+class PrintSink:
+    # Prints the human-readable message (the environments' original behaviour)
+    def emit(self, kind, message, **fields):
+        print(message)
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    # Drops every event
+    def emit(self, kind, message, **fields):
+        pass
+
+    def close(self):
+        pass
+
+
+class CounterSink:
+    # Only counts events per kind
+    def __init__(self):
+        self.counts = Counter()
+
+    def emit(self, kind, message, **fields):
+        self.counts[kind] += 1
+
+    def close(self):
+        pass
+
+
+class RingBufferSink:
+    # Keeps the last `capacity` events in memory
+    def __init__(self, capacity=1000):
+        self.events = deque(maxlen=capacity)
+
+    def emit(self, kind, message, **fields):
+        self.events.append((kind, message, fields))
+
+    def close(self):
+        pass
+
+
+class JsonlSink:
+    # Appends one JSON object per event to a file
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def emit(self, kind, message, **fields):
+        self.file.write(json.dumps({'event': kind, 'message': message, **fields}) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+# Build a sink from its name, as used by run.py's --events option
+def make_sink(name, path=None, capacity=1000):
+    if name == 'print':
+        return PrintSink()
+    elif name == 'null':
+        return NullSink()
+    elif name == 'counter':
+        return CounterSink()
+    elif name == 'ring':
+        return RingBufferSink(capacity)
+    elif name == 'jsonl':
+        if path is None:
+            raise ValueError("The jsonl event sink needs a file path")
+        return JsonlSink(path)
+    raise ValueError(f"Unknown event sink: {name}")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+from array import array  # Compact lists of cell ids.
+from collections.abc import Sequence  # Read-only position views behave like the old lists.
+
+"""
+Compact grid state shared by the environments: one byte per cell holding its type, plus arrays of the treasure and
+enemy cell ids in placement order. Picking up a treasure or checking for an enemy only reads or writes one cell,
+instead of scanning a list of positions.
+The nested-list `grid` and the `treasures` / `enemies` lists the agents read are exposed as read-only views:
+position views read the arrays and cells directly, and the grid view is only built when an agent first asks for it,
+then kept in sync row by row. Environments stepped without such agents never pay for it.
+Snapshots copy the cell bytes (a single memcpy) and share everything that only changes when a new grid is laid out.
+"""
+
+# Cell codes, shared with the stacked grids of VecTreasureHunting
+EMPTY = 0
+TREASURE = 1
+OBSTACLE = 2
+SWITCH = 3
+DOOR = 4
+ENEMY = 5
+
+CELL_CHARS = ('', 'T', 'O', 'S', 'D', 'E')  # Code -> the string the nested-list grids used
+CELL_CODES = {char: code for code, char in enumerate(CELL_CHARS)}
+
+
+class GridView(list):
+    # Read-only list of row tuples, so `grid[x][y]` stays as fast as it was with nested lists
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("The grid view is read-only; change cells through the environment")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = pop = remove = clear = sort = reverse = _read_only
+
+    # Equal to a nested-list grid with the same cells
+    def __eq__(self, other):
+        if isinstance(other, list):
+            return len(self) == len(other) and all(list(row) == list(other_row) for row, other_row in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+
+class PositionsView(Sequence):
+    # Read-only view of the treasure or enemy positions, in placement order; `in` and len() are O(1)
+    __slots__ = ('state', 'code')
+
+    def __init__(self, state, code):
+        self.state = state
+        self.code = code
+
+    def __len__(self):
+        if self.code == TREASURE:
+            return self.state.treasure_count
+        return len(self.state.enemy_ids)
+
+    def __iter__(self):
+        state = self.state
+        cells, size, code = state.cells, state.size, self.code
+        cell_ids = state.treasure_ids if code == TREASURE else state.enemy_ids
+        # Collected treasures stay in the id list; their cells no longer hold the code
+        return (divmod(cell_id, size) for cell_id in cell_ids if cells[cell_id] == code)
+
+    def __contains__(self, position):
+        x, y = position
+        size = self.state.size
+        return 0 <= x < size and 0 <= y < size and self.state.cells[x * size + y] == self.code
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, (PositionsView, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class GridState:
+    __slots__ = ('size', 'cells', 'treasure_ids', 'treasure_count', 'enemy_ids', 'view', 'version')
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = bytearray(size * size)  # Cell code per flat cell id x * size + y
+        self.treasure_ids = array('i')  # Cell ids of the placed treasures, in placement order
+        self.treasure_count = 0  # Treasures not collected yet
+        self.enemy_ids = []  # Few and rewritten on every enemy move, so a plain list
+        self.view = None  # GridView, built on first access to `grid`
+        self.version = 0  # Bumped by every change to the cells or the enemies, so caches can tell the state moved on
+
+    # Cell code at (x, y)
+    def get(self, x, y):
+        return self.cells[x * self.size + y]
+
+    # Change the cell code at (x, y), and the grid view's row if it was built
+    def set(self, x, y, code):
+        self.cells[x * self.size + y] = code
+        self.version += 1
+        if self.view is not None:
+            list.__setitem__(self.view, x, self.row(x))
+
+    # One row of the grid view
+    def row(self, x):
+        size = self.size
+        return tuple(CELL_CHARS[code] for code in self.cells[x * size:(x + 1) * size])
+
+    # Nested-list style view of the cells, built once and then kept in sync
+    @property
+    def grid(self):
+        if self.view is None:
+            self.view = GridView(self.row(x) for x in range(self.size))
+        return self.view
+
+    def treasures(self):
+        return PositionsView(self, TREASURE)
+
+    def enemies(self):
+        return PositionsView(self, ENEMY)
+
+    def add_treasure(self, position):
+        self.set(position[0], position[1], TREASURE)
+        self.treasure_ids.append(position[0] * self.size + position[1])
+        self.treasure_count += 1
+
+    def remove_treasure(self, position):
+        self.set(position[0], position[1], EMPTY)
+        self.treasure_count -= 1
+
+    def has_enemy(self, position):
+        return self.cells[position[0] * self.size + position[1]] == ENEMY
+
+    # Rebuild the grid view's rows after cells were written directly (e.g. through a NumPy view of `cells`)
+    def refresh_rows(self, xs):
+        self.version += 1
+        if self.view is not None:
+            for x in set(xs):
+                list.__setitem__(self.view, x, self.row(x))
+
+    # Replace all enemy positions at once, keeping their order (their cells are already marked)
+    def set_enemies(self, positions):
+        size = self.size
+        self.enemy_ids = [x * size + y for x, y in positions]
+        self.version += 1
+
+    # Immutable copy of the changing part of the state; the treasure id array is shared, it only grows during placement
+    def snapshot(self):
+        return bytes(self.cells), self.treasure_ids, self.treasure_count, tuple(self.enemy_ids)
+
+    # Put back a snapshot in place, so the grid view (and agents holding it) stay valid
+    def restore(self, token):
+        cells, self.treasure_ids, self.treasure_count, enemy_ids = token
+        self.enemy_ids = list(enemy_ids)
+        self.version += 1
+        view = self.view
+        if view is None or self.cells == cells:
+            self.cells[:] = cells
+            return
+        size = self.size
+        # Only the rows of the view that differ are rebuilt
+        changed = [x for x in range(size) if self.cells[x * size:(x + 1) * size] != cells[x * size:(x + 1) * size]]
+        self.cells[:] = cells
+        for x in changed:
+            list.__setitem__(view, x, self.row(x))
+
+    # Independent copy; the grid view is not copied and is rebuilt by the copy on demand
+    def copy(self):
+        state = GridState.__new__(GridState)
+        state.size = self.size
+        state.cells = bytearray(self.cells)
+        state.treasure_ids = self.treasure_ids
+        state.treasure_count = self.treasure_count
+        state.enemy_ids = list(self.enemy_ids)
+        state.view = None
+        state.version = self.version
+        return state
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import argparse  # Command line for building level packs.
+import os  # Absolute paths as keys of the loaded-pack cache.
+from collections import deque  # Flood fill queue.
+import numpy as np  # Sampling without replacement and the packed arrays.
+try:
+    from Environments.gridstate import GridState, EMPTY, TREASURE, OBSTACLE, SWITCH, DOOR, ENEMY  # Cell codes.
+except ImportError:  # Run directly as a script from Environments/
+    from gridstate import GridState, EMPTY, TREASURE, OBSTACLE, SWITCH, DOOR, ENEMY
+
+"""
+Procedural levels for TreasureHunting ('treasure') and PuzzleWithEnemies ('puzzle'), generated from a seed.
+Cells are drawn without replacement (numpy Generator.choice), so every draw lands on a free cell however full the grid
+is. Blocking cells - obstacles, and the door of a puzzle, which stays shut until the switch is found - are drawn
+first from every cell but the agent's start (0, 0). One flood fill from the start then gives the cells the agent can
+reach, and the switch, treasures and enemies are drawn from those only, so no treasure is ever cut off. Should the
+blocking cells wall the start into an area too small for the items, they are drawn again (same generator, so the
+level still only depends on the seed).
+Puzzle levels have no obstacles, PuzzleWithEnemies has no rules for them.
+Levels generated from a range of seeds are saved together as a level pack, a compressed .npz file with one row of
+cell codes per level plus the treasure and enemy cell ids in placement order. Both environments take
+`level_pack=<path>` (or a LevelPack) and an optional `level=<index>`; without an index each new grid is a level picked
+with the environment's generator, so run.py seeds still decide the map. Loaded packs are cached per process.
+    python3 Environments/levels.py --kind treasure --size 50 --seeds 0:1000 --output levels/treasure50.npz
+"""
+
+KINDS = ('treasure', 'puzzle')
+MAX_ATTEMPTS = 100  # Draws of the blocking cells before a seed is given up
+_PACKS = {}  # Absolute path -> LevelPack loaded in this process
+
+
+class Level:
+    __slots__ = ('size', 'cells', 'treasure_ids', 'enemy_ids', 'seed')
+
+    def __init__(self, size, cells, treasure_ids, enemy_ids=(), seed=None):
+        self.size = size
+        self.cells = bytes(cells)  # Cell code per flat cell id x * size + y
+        self.treasure_ids = list(treasure_ids)  # In placement order
+        self.enemy_ids = list(enemy_ids)
+        self.seed = seed
+
+    # Positions of every cell holding `code`, row by row
+    def positions(self, code):
+        cell_ids = np.flatnonzero(np.frombuffer(self.cells, dtype=np.uint8) == code)
+        return [divmod(int(cell_id), self.size) for cell_id in cell_ids]
+
+    # Fresh grid state laid out like this level
+    def build_state(self):
+        state = GridState(self.size)
+        state.cells[:] = self.cells
+        state.treasure_ids.extend(self.treasure_ids)
+        state.treasure_count = len(self.treasure_ids)
+        state.enemy_ids = list(self.enemy_ids)
+        return state
+
+
+# Cells reachable from `start` through cells whose `blocked` byte is 0, as one flag byte per cell id
+def flood_fill(blocked, size, start=0):
+    seen = bytearray(blocked)  # Non-zero once blocked or reached
+    reached = bytearray(size * size)
+    if seen[start]:
+        return reached
+    seen[start] = reached[start] = 1
+    queue = deque([start])
+    while queue:
+        cell_id = queue.popleft()
+        y = cell_id % size
+        for neighbor in (cell_id - size, cell_id + size, cell_id - 1 if y else -1, cell_id + 1 if y < size - 1 else -1):
+            if 0 <= neighbor < len(seen) and not seen[neighbor]:
+                seen[neighbor] = reached[neighbor] = 1
+                queue.append(neighbor)
+    return reached
+
+
+# Item counts of a level kind, defaulting to what the environment places itself
+def level_counts(kind, size, treasures=None, obstacles=None, enemies=None, density=None):
+    if kind not in KINDS:
+        raise ValueError(f"Unknown level kind: {kind} (expected one of {', '.join(KINDS)})")
+    if density is not None:
+        obstacles = int(density * size * size)
+    if kind == 'treasure':
+        return (size if treasures is None else treasures), (int(size * 0.35) if obstacles is None else obstacles), 0
+    if obstacles:
+        raise ValueError("Puzzle levels cannot have obstacles")
+    return (3 if treasures is None else treasures), 0, (2 if enemies is None else enemies)
+
+
+# One level from `seed`; obstacle `density` (share of the cells) overrides the obstacle count
+def generate_level(kind, size, seed, treasures=None, obstacles=None, enemies=None, density=None):
+    treasures, obstacles, enemies = level_counts(kind, size, treasures, obstacles, enemies, density)
+    rng = np.random.default_rng(seed)
+    cell_count = size * size
+    blocking = obstacles + (1 if kind == 'puzzle' else 0)  # The door blocks until the switch opens it
+    if blocking > cell_count - 1:
+        raise ValueError(f"{blocking} blocking cells do not fit on a {size}x{size} grid")
+    wanted = treasures + enemies + (1 if kind == 'puzzle' else 0)
+    for _ in range(MAX_ATTEMPTS):
+        cells = np.zeros(cell_count, dtype=np.uint8)
+        blocked_ids = rng.choice(cell_count - 1, blocking, replace=False) + 1  # Never the start cell
+        cells[blocked_ids[:obstacles]] = OBSTACLE
+        cells[blocked_ids[obstacles:]] = DOOR
+        # Everything else goes on cells the agent can reach
+        free = np.flatnonzero(np.frombuffer(flood_fill(cells.tobytes(), size), dtype=np.uint8))
+        free = free[free != 0]
+        if wanted <= len(free):
+            break
+    else:
+        raise ValueError(f"Seed {seed}: {wanted} items do not fit on the cells reachable from the start")
+    picked = free[rng.choice(len(free), wanted, replace=False)]
+    if kind == 'puzzle':
+        cells[picked[0]] = SWITCH
+        picked = picked[1:]
+    treasure_ids, enemy_ids = picked[:treasures], picked[treasures:]
+    cells[treasure_ids] = TREASURE
+    cells[enemy_ids] = ENEMY
+    return Level(size, cells.tobytes(), treasure_ids.tolist(), enemy_ids.tolist(), seed)
+
+
+# Levels for every seed in `seeds`
+def generate_levels(kind, size, seeds, **counts):
+    return [generate_level(kind, size, seed, **counts) for seed in seeds]
+
+
+class LevelPack:
+    def __init__(self, kind, size, cells, treasure_ids, enemy_ids, seeds):
+        self.kind = kind
+        self.size = size
+        self.cells = cells  # (levels, size * size) uint8
+        self.treasure_ids = treasure_ids  # (levels, treasures) int32
+        self.enemy_ids = enemy_ids  # (levels, enemies) int32
+        self.seeds = seeds  # (levels,) int64
+
+    # Pack a list of levels of the same kind, size and item counts
+    @classmethod
+    def from_levels(cls, kind, levels):
+        if not levels:
+            raise ValueError("A level pack needs at least one level")
+        size = levels[0].size
+        if any(level.size != size for level in levels):
+            raise ValueError("Every level of a pack must have the same size")
+        return cls(kind, size,
+                   np.array([np.frombuffer(level.cells, dtype=np.uint8) for level in levels]),
+                   np.array([level.treasure_ids for level in levels], dtype=np.int32).reshape(len(levels), -1),
+                   np.array([level.enemy_ids for level in levels], dtype=np.int32).reshape(len(levels), -1),
+                   np.array([-1 if level.seed is None else level.seed for level in levels], dtype=np.int64))
+
+    def __len__(self):
+        return len(self.cells)
+
+    def level(self, index):
+        return Level(self.size, self.cells[index].tobytes(), self.treasure_ids[index].tolist(),
+                     self.enemy_ids[index].tolist(), int(self.seeds[index]))
+
+    # Check the pack fits an environment before laying one of its levels out
+    def check(self, kind, size):
+        if self.kind != kind or self.size != size:
+            raise ValueError(f"Level pack holds {self.kind} levels of size {self.size}, "
+                             f"the environment needs {kind} levels of size {size}")
+
+    def save(self, path):
+        np.savez_compressed(path, kind=np.array(self.kind), size=np.array(self.size), cells=self.cells,
+                            treasure_ids=self.treasure_ids, enemy_ids=self.enemy_ids, seeds=self.seeds)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(str(data['kind']), int(data['size']), data['cells'], data['treasure_ids'], data['enemy_ids'],
+                       data['seeds'])
+
+
+# Level pack at `path`, loaded once per process; a LevelPack is returned as it is
+def load_pack(pack):
+    if isinstance(pack, LevelPack):
+        return pack
+    path = os.path.abspath(pack)
+    if path not in _PACKS:
+        _PACKS[path] = LevelPack.load(path)
+    return _PACKS[path]
+
+
+# Generate the levels of a seed range and save them as one pack
+def build_pack(path, kind, size, seeds, **counts):
+    pack = LevelPack.from_levels(kind, generate_levels(kind, size, seeds, **counts))
+    pack.save(path)
+    return pack
+
+
+def parse_seeds(text):
+    # "start:stop" for a range, or a comma-separated list
+    if ':' in text:
+        start, stop = text.split(':')
+        return range(int(start), int(stop))
+    return [int(seed) for seed in text.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a level pack from a range of seeds.")
+    parser.add_argument("--kind", choices=KINDS, default='treasure')
+    parser.add_argument("--size", type=int, default=5, help="Grid size")
+    parser.add_argument("--seeds", type=parse_seeds, default=range(100), help="start:stop or a comma-separated list")
+    parser.add_argument("--treasures", type=int, default=None)
+    parser.add_argument("--obstacles", type=int, default=None)
+    parser.add_argument("--density", type=float, default=None, help="Obstacle share of cells, overrides --obstacles")
+    parser.add_argument("--enemies", type=int, default=None)
+    parser.add_argument("--output", required=True, help="Path of the .npz level pack")
+    args = parser.parse_args()
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    pack = build_pack(args.output, args.kind, args.size, args.seeds, treasures=args.treasures,
+                      obstacles=args.obstacles, enemies=args.enemies, density=args.density)
+    print(f"Saved {len(pack)} {args.kind} levels of size {args.size} to {args.output}")
@@ -1,32 +1,99 @@
 #!/usr/bin/env python3
 
 import random  # Random treasures and obstacles placements on the grid. Random movements.
+import numpy as np  # Array-based enemy moves for crowded levels.
+try:
+    from Environments.events import PrintSink, NullSink  # Default event sink, prints every event like before.
+    from Environments.gridstate import GridState, EMPTY, TREASURE, SWITCH, DOOR, ENEMY, CELL_CODES  # Compact cell storage.
+    from Environments.levels import load_pack  # Pre-generated levels.
+except ImportError:  # Run directly as a script from Environments/
+    from events import PrintSink, NullSink
+    from gridstate import GridState, EMPTY, TREASURE, SWITCH, DOOR, ENEMY, CELL_CODES
+    from levels import load_pack
 
 """
 The PuzzleWithEnemies represents a simple 2D grid-based environment where an agent can move around, collect treasures, and interact with a switch and a door.
 Moving Enemies are also present in the environment, and the agent must avoid them to survive.
+Cells are stored compactly (Environments/gridstate.py); `grid`, `treasures` and `enemies` are read-only views of that state.
+snapshot() / restore(token) and clone() branch the world state, including the random generator the enemies move with.
+The number of enemies is configurable (enemy_count, 2 by default). From VECTOR_ENEMIES enemies on, move_enemies steps
+them all at once with NumPy: every enemy's shuffled move order is drawn in one batch, and over four rounds each enemy
+still waiting tries its next move into an empty cell. When several enemies want the same cell in one round, the one
+placed first gets it; the others try their next move. The byte-per-cell grid is the occupancy index, so checking a
+cell for an enemy stays O(1) however many there are.
+With a level pack (Environments/levels.py) the grid is taken from the pack instead of being placed at random: level
+`level` every time, or one picked with the generator on every reset; the enemy count is then the level's.
 """
 
+VECTOR_ENEMIES = 32  # Enemy count from which move_enemies uses the array-based stepper
+_MOVE_DX = np.array([-1, 1, 0, 0])  # UP, DOWN, LEFT, RIGHT
+_MOVE_DY = np.array([0, 0, -1, 1])
+
+
 class PuzzleWithEnemies:
-    def __init__(self, size):
+    def __init__(self, size, events=None, rng=None, enemy_count=2, level_pack=None, level=None):
         # Initializes the grid, places the agent, switch, door, treasures, and enemies.
+        # Events (treasure, switch, door, deaths) go to `events`, see Environments/events.py.
+        # Placement and enemy moves draw from `rng`, by default a private generator seeded from the global one, so
+        # random.seed() still fixes the episode and restore() rewinds only the environment's draws, not the agents'.
+        # With `level_pack` the layout is a level of the pack instead, see Environments/levels.py.
+        self.levels = load_pack(level_pack) if level_pack is not None else None
+        self.level = level
+        if self.levels is None and enemy_count + 6 > size * size:
+            raise ValueError(f"{enemy_count} enemies do not fit on a {size}x{size} grid")
         self.size = size
-        self.grid = [['' for _ in range(size)] for _ in range(size)]
+        self.enemy_count = enemy_count
+        self.events = events if events is not None else PrintSink()
+        self.rng = rng if rng is not None else random.Random(random.getrandbits(64))
         self.agent_position = (0, 0)
-        self.switch_position = self.place_item('S')
-        self.door_position = self.place_item('D')
-        self.treasures = self.place_items('T', 3)
-        self.enemies = self.place_items('E', 2)  # 2 enemies
+        if self.levels is not None:
+            self.load_level()
+        else:
+            self.state = GridState(size)
+            self.switch_position = self.place_item('S')
+            self.door_position = self.place_item('D')
+            self.place_items('T', 3)
+            self.state.set_enemies(self.place_items('E', enemy_count))
         self.door_open = False
+        self.exited = False  # Set once the agent walks out through the open door
         self.score = 0
         self.alive = True
 
+    @property
+    def grid(self):
+        # Read-only nested-list view of the cells.
+        return self.state.grid
+
+    @property
+    def treasures(self):
+        # Read-only view of the treasure positions, in placement order.
+        return self.state.treasures()
+
+    @property
+    def enemies(self):
+        # Read-only view of the enemy positions.
+        return self.state.enemies()
+
+    def load_level(self):
+        # Lays out level `level` of the pack, or one picked with the generator.
+        self.levels.check('puzzle', self.size)
+        index = self.level if self.level is not None else self.rng.randrange(len(self.levels))
+        level = self.levels.level(index)
+        self.state = level.build_state()
+        self.switch_position = level.positions(SWITCH)[0]
+        self.door_position = level.positions(DOOR)[0]
+        self.enemy_count = len(level.enemy_ids)
+
     def place_item(self, item):
         # Places a single item randomly on the grid.
+        code = CELL_CODES[item]
         while True:
-            x, y = random.randint(0, self.size - 1), random.randint(0, self.size - 1)
-            if (x, y) != self.agent_position and self.grid[x][y] == '':
-                self.grid[x][y] = item
+            x, y = self.rng.randint(0, self.size - 1), self.rng.randint(0, self.size - 1)
+            if (x, y) != self.agent_position and self.state.get(x, y) == EMPTY:
+                if code == TREASURE:
+                    self.state.add_treasure((x, y))
+                else:
+                    self.state.set(x, y, code)
                 return (x, y)
 
     def place_items(self, item, count):
@@ -65,37 +132,37 @@ class PuzzleWithEnemies:
 
         # Check if the new position is valid and not an obstacle.
         if self.is_valid(new_pos):
-            cell = self.grid[new_pos[0]][new_pos[1]]
+            cell = self.state.cells[new_pos[0] * self.size + new_pos[1]]
 
-            if cell == 'E':
+            if cell == ENEMY:
                 # Agent encounters an enemy and dies.
-                print("You were caught by an enemy!")
+                self.events.emit('caught', "You were caught by an enemy!", position=new_pos)
                 self.alive = False
                 return 'dead'
 
-            if cell == 'D' and not self.door_open:
+            if cell == DOOR and not self.door_open:
                 # Agent tries to exit through a locked door.
-                print("Door is locked! Find the switch.")
+                self.events.emit('door_locked', "Door is locked! Find the switch.", position=new_pos)
                 return False
-            elif cell == 'D' and self.door_open:
+            elif cell == DOOR and self.door_open:
                 # Agent exits successfully.
-                print("You escaped! Level complete.")
+                self.events.emit('exit', "You escaped! Level complete.", position=new_pos)
                 self.agent_position = new_pos
+                self.exited = True
                 self.score += 10
                 return 'exit'
 
-            if cell == 'S':
+            if cell == SWITCH:
                 # Agent activates the switch to open the door.
-                print("Switch activated! Door is now open.")
+                self.events.emit('switch', "Switch activated! Door is now open.", position=new_pos)
                 self.door_open = True
-                self.grid[new_pos[0]][new_pos[1]] = ''
+                self.state.set(new_pos[0], new_pos[1], EMPTY)
                 self.score += 1
 
-            if cell == 'T':
+            if cell == TREASURE:
                 # Agent collects a treasure.
-                print("Collected a treasure!")
-                self.treasures.remove(new_pos)
-                self.grid[new_pos[0]][new_pos[1]] = ''
+                self.events.emit('treasure', "Collected a treasure!", position=new_pos)
+                self.state.remove_treasure(new_pos)
                 self.score += 2
 
             # Update agent's position.
@@ -105,11 +172,16 @@ class PuzzleWithEnemies:
 
     def move_enemies(self):
         # Moves enemies randomly on the grid.
+        state = self.state
+        if len(state.enemy_ids) >= VECTOR_ENEMIES:
+            self.move_enemies_vectorized()
+            return
         new_positions = []
-        for pos in self.enemies:
-            x, y = pos
+        cells = state.cells
+        for enemy_id in state.enemy_ids:
+            pos = x, y = divmod(enemy_id, self.size)
             moves = ['UP', 'DOWN', 'LEFT', 'RIGHT']
-            random.shuffle(moves)
+            self.rng.shuffle(moves)
             moved = False
             for move in moves:
                 if move == 'UP':
@@ -121,21 +193,61 @@ class PuzzleWithEnemies:
                 elif move == 'RIGHT':
                     new_pos = (x, y + 1)
 
-                if self.is_valid(new_pos) and self.grid[new_pos[0]][new_pos[1]] == '':
+                if self.is_valid(new_pos) and cells[new_pos[0] * self.size + new_pos[1]] == EMPTY:
                     # Move enemy to a new valid position.
-                    self.grid[x][y] = ''
-                    self.grid[new_pos[0]][new_pos[1]] = 'E'
+                    state.set(x, y, EMPTY)
+                    state.set(new_pos[0], new_pos[1], ENEMY)
                     new_positions.append(new_pos)
                     moved = True
                     break
             if not moved:
                 # Enemy stays in the same position if no valid move is found.
                 new_positions.append(pos)
-        self.enemies = new_positions
+        state.set_enemies(new_positions)
 
-        if self.agent_position in self.enemies:
+        if state.has_enemy(self.agent_position):
             # Enemy moves onto the agent, ending the game.
-            print("Enemy moved onto agent! Game over.")
+            self.events.emit('enemy_caught', "Enemy moved onto agent! Game over.", position=self.agent_position)
+            self.alive = False
+
+    def move_enemies_vectorized(self):
+        # Moves all enemies at once; a random move order per enemy, conflicts go to the enemy placed first.
+        state = self.state
+        size = self.size
+        cells = np.frombuffer(state.cells, dtype=np.uint8)  # Writable view, the cell codes are the occupancy index
+        ids = np.array(state.enemy_ids, dtype=np.int64)
+        old_ids = ids.copy()
+        xs, ys = np.divmod(ids, size)
+        # Seeded from self.rng, so snapshots and clones replay the same moves
+        rng = np.random.default_rng(self.rng.getrandbits(64))
+        order = rng.random((len(ids), 4)).argsort(axis=1)
+        waiting = np.arange(len(ids))
+        for rank in range(4):
+            move = order[waiting, rank]
+            nx = xs[waiting] + _MOVE_DX[move]
+            ny = ys[waiting] + _MOVE_DY[move]
+            inside = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+            movers, targets = waiting[inside], nx[inside] * size + ny[inside]
+            free = cells[targets] == EMPTY
+            movers, targets = movers[free], targets[free]
+            # `movers` is in placement order, so the first index of each target is the enemy placed first
+            targets, first = np.unique(targets, return_index=True)
+            winners = movers[first]
+            cells[ids[winners]] = EMPTY
+            cells[targets] = ENEMY
+            ids[winners] = targets
+            xs[winners], ys[winners] = np.divmod(targets, size)
+            waiting = np.setdiff1d(waiting, winners, assume_unique=True)
+            if not len(waiting):
+                break
+        del cells  # Release the view of the bytearray
+        moved = ids != old_ids
+        state.refresh_rows(np.concatenate((old_ids[moved], ids[moved])) // size)  # Also bumps state.version
+        state.enemy_ids = ids.tolist()
+
+        if state.has_enemy(self.agent_position):
+            # Enemy moves onto the agent, ending the game.
+            self.events.emit('enemy_caught', "Enemy moved onto agent! Game over.", position=self.agent_position)
             self.alive = False
 
     def display(self):
@@ -146,13 +258,13 @@ class PuzzleWithEnemies:
                 pos = (i, j)
                 if pos == self.agent_position and self.alive:
                     row += ' A '
-                elif self.grid[i][j] == 'T':
+                elif self.state.get(i, j) == TREASURE:
                     row += ' T '
-                elif self.grid[i][j] == 'S':
+                elif self.state.get(i, j) == SWITCH:
                     row += ' S '
-                elif self.grid[i][j] == 'D':
+                elif self.state.get(i, j) == DOOR:
                     row += ' D '
-                elif self.grid[i][j] == 'E':
+                elif self.state.get(i, j) == ENEMY:
                     row += ' E '
                 else:
                     row += ' . '
@@ -166,9 +278,32 @@ class PuzzleWithEnemies:
 
     def reset(self):
         # Resets the environment to its initial state.
-        self.__init__(self.size)
+        self.__init__(self.size, self.events, self.rng, self.enemy_count, self.levels, self.level)
         return self.grid, self.agent_position, self.treasures, self.enemies
 
+    def snapshot(self):
+        # Returns a token holding everything a step or reset can change, including the generator state.
+        return (self.state.snapshot(), self.agent_position, self.switch_position, self.door_position,
+                self.door_open, self.exited, self.score, self.alive, self.rng.getstate())
+
+    def restore(self, token):
+        # Returns to a snapshot taken from this environment.
+        (state, self.agent_position, self.switch_position, self.door_position,
+         self.door_open, self.exited, self.score, self.alive, rng_state) = token
+        self.state.restore(state)
+        self.rng.setstate(rng_state)
+
+    def clone(self, events=None):
+        # Independent copy with its own generator in the same state. Its events are dropped unless a sink is given,
+        # so lookahead rollouts do not print.
+        env = self.__class__.__new__(self.__class__)
+        env.__dict__.update(self.__dict__)
+        env.state = self.state.copy()
+        env.events = events if events is not None else NullSink()
+        env.rng = random.Random.__new__(random.Random)  # Skips seeding from the OS, the state is set right after
+        env.rng.setstate(self.rng.getstate())
+        return env
+
 #  Example usage
 if __name__ == '__main__':
     env = PuzzleWithEnemies(6)
@@ -1,40 +1,79 @@
 #!/usr/bin/env python3
 
 import random  # Random treasures and obstacles placements on the grid. Random movements.
-import copy  # To copy-deep the grid environment for different agents.
 import heapq  # To enable priority queue functionality where the smallest value is always first.
 from collections import deque  # Queuing from both front and back ends as either FIFO or LIFO.
+try:
+    from Environments.gridstate import GridState, EMPTY, TREASURE, OBSTACLE, CELL_CODES  # Compact cell storage.
+    from Environments.levels import load_pack  # Pre-generated levels.
+except ImportError:  # Run directly as a script from Environments/
+    from gridstate import GridState, EMPTY, TREASURE, OBSTACLE, CELL_CODES
+    from levels import load_pack
 
 """
 The TresureHunting represents a simple 2D grid-based and randomly generated environment where an agent can move around, collect treasures, and avoid obstacles.
+Cells are stored compactly (Environments/gridstate.py); `grid` and `treasures` are read-only views of that state.
+snapshot() / restore(token) and clone() branch the world state, including the random generator, for lookahead search.
+With a level pack (Environments/levels.py) grids are taken from the pack instead of being placed at random: level
+`level` every time, or one picked with the generator for each new grid.
 """
 
 class TreasureHunting:
-    def __init__(self, size):
+    def __init__(self, size, rng=None, level_pack=None, level=None):
         self.size = size
-        self.grid = self.create_grid()
+        # A private generator unless given one; it is seeded from the global one, so random.seed() still fixes the map,
+        # and restore() rewinds only the environment's draws, never those of the agents
+        self.rng = rng if rng is not None else random.Random(random.getrandbits(64))
+        self.levels = load_pack(level_pack) if level_pack is not None else None
+        if self.levels is not None:
+            self.levels.check('treasure', size)
+        self.level = level  # Index of the pack level to play, None for a random one per grid
         self.agent_position = (0, 0)
         self.alive = True
         self.score = 0
+        self.lay_out()
 
+    # Place the items of a new grid, or lay out a level of the pack
+    def lay_out(self):
+        if self.levels is not None:
+            index = self.level if self.level is not None else self.rng.randrange(len(self.levels))
+            level = self.levels.level(index)
+            self.state = level.build_state()
+            self.obstacles = level.positions(OBSTACLE)
+            return
+        self.state = self.create_grid()
         # For treasures: count = size → % coverage = (size / (size * size)) * 100 = (1 / size) * 100
         # For obstacles: count = int(size * 0.35) → not a true 35% coverage; it's just a rough estimate
-        self.treasures = self.put_items('T', size)
-        self.obstacles = self.put_items('O', int(size * 0.35))
+        self.put_items('T', self.size)
+        self.obstacles = self.put_items('O', int(self.size * 0.35))
 
     # Create an empty grid
     def create_grid(self):
-        return [['' for _ in range(self.size)] for _ in range(self.size)]
+        return GridState(self.size)
+
+    # Read-only nested-list view of the cells
+    @property
+    def grid(self):
+        return self.state.grid
+
+    # Read-only view of the treasure positions, in placement order
+    @property
+    def treasures(self):
+        return self.state.treasures()
 
     # Place items (T = treasure, O = obstacle) randomly on grid
     def put_items(self, item_type, count):
+        code = CELL_CODES[item_type]
         positions = []
         for _ in range(count):
             while True:
-                x = random.randint(0, self.size - 1)
-                y = random.randint(0, self.size - 1)
-                if (x, y) != self.agent_position and self.grid[x][y] == '':
-                    self.grid[x][y] = item_type
+                x = self.rng.randint(0, self.size - 1)
+                y = self.rng.randint(0, self.size - 1)
+                if (x, y) != self.agent_position and self.state.get(x, y) == EMPTY:
+                    if code == TREASURE:
+                        self.state.add_treasure((x, y))
+                    else:
+                        self.state.set(x, y, code)
                     positions.append((x, y))
                     break
         return positions
@@ -60,16 +99,15 @@ class TreasureHunting:
             return False  # Invalid action
 
         if self.is_valid_position(new_pos):
-            cell = self.grid[new_pos[0]][new_pos[1]]
-            if cell != 'O':  # not an obstacle
+            cell = self.state.cells[new_pos[0] * self.size + new_pos[1]]
+            if cell != OBSTACLE:  # not an obstacle
                 self.agent_position = new_pos
                 # Check if the agent is on a treasure
-                if cell == 'T':
+                if cell == TREASURE:
                     self.score += 1
-                    self.grid[new_pos[0]][new_pos[1]] = ''
-                    self.treasures.remove(new_pos)
+                    self.state.remove_treasure(new_pos)
                     # Check if all treasures are collected
-                    if not self.treasures:
+                    if not self.state.treasure_count:
                         self.alive = False  # stop the run if no more treasures
                 # Check if the agent is on an obstacle
                 return True
@@ -83,9 +121,9 @@ class TreasureHunting:
                 pos = (row, col)
                 if pos == self.agent_position:
                     grid_row += ' A '
-                elif self.grid[row][col] == 'T':
+                elif self.state.get(row, col) == TREASURE:
                     grid_row += ' T '
-                elif self.grid[row][col] == 'O':
+                elif self.state.get(row, col) == OBSTACLE:
                     grid_row += ' O '
                 else:
                     grid_row += ' . '
@@ -99,14 +137,31 @@ class TreasureHunting:
 
     # Reset environment to initial state
     def reset(self):
-        self.grid = self.create_grid()
         self.agent_position = (0, 0)
         self.alive = True
         self.score = 0
-        self.treasures = self.put_items('T', self.size)
-        self.obstacles = self.put_items('O', int(self.size * 0.35))
+        self.lay_out()
         return self.grid, self.agent_position, self.treasures, self.obstacles
 
+    # Token holding everything a step or reset can change, including the generator state
+    def snapshot(self):
+        return self.state.snapshot(), self.agent_position, self.score, self.alive, self.obstacles, self.rng.getstate()
+
+    # Return to a snapshot taken from this environment
+    def restore(self, token):
+        state, self.agent_position, self.score, self.alive, self.obstacles, rng_state = token
+        self.state.restore(state)
+        self.rng.setstate(rng_state)
+
+    # Independent copy with its own generator in the same state; unchanged data such as the obstacle list is shared
+    def clone(self):
+        env = self.__class__.__new__(self.__class__)
+        env.__dict__.update(self.__dict__)
+        env.state = self.state.copy()
+        env.rng = random.Random.__new__(random.Random)  # Skips seeding from the OS, the state is set right after
+        env.rng.setstate(self.rng.getstate())
+        return env
+
 # Example usage
 if __name__ == '__main__':
     env = TreasureHunting(5)
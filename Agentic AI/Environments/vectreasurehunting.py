@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+import random  # Per-environment generators, drawn exactly like TreasureHunting.put_items.
+import numpy as np  # Stacked grids and batched moves.
+try:
+    from Environments.gridstate import EMPTY, TREASURE, OBSTACLE  # Cell codes shared with the scalar environments.
+except ImportError:  # Run directly as a script from Environments/
+    from gridstate import EMPTY, TREASURE, OBSTACLE
+
+"""
+The VecTreasureHunting holds N independent TreasureHunting grids as stacked NumPy arrays and steps all of them with one call.
+Each grid follows the rules of TreasureHunting.move_agent and is laid out with the same draws as TreasureHunting.put_items,
+so env i seeded with `seed + i` reproduces `TreasureHunting(size, rng=random.Random(seed + i))` and every following
+reset().
+Finished episodes are reset automatically.
+"""
+
+# Action indices follow the order used by the agents' Q-tables
+ACTIONS = ['UP', 'DOWN', 'LEFT', 'RIGHT']
+ACTION_INDEX = {action: index for index, action in enumerate(ACTIONS)}
+DELTAS = np.array([[-1, 0], [1, 0], [0, -1], [0, 1]], dtype=np.int64)
+
+
+class VecTreasureHunting:
+    def __init__(self, num_envs, size, seed=None, max_steps=None):
+        self.num_envs = num_envs
+        self.size = size
+        self.max_steps = max_steps
+        self.treasure_count = size
+        self.obstacle_count = int(size * 0.35)
+
+        # One generator per env so each grid is reproducible on its own
+        if seed is None:
+            self.rngs = [random.Random() for _ in range(num_envs)]
+        else:
+            self.rngs = [random.Random(seed + i) for i in range(num_envs)]
+
+        self.cells = np.zeros((num_envs, size, size), dtype=np.uint8)
+        self.positions = np.zeros((num_envs, 2), dtype=np.int64)
+        self.scores = np.zeros(num_envs, dtype=np.int64)
+        self.treasures_left = np.zeros(num_envs, dtype=np.int64)
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        # Positions and scores of the episodes that ended on the last step, before auto-reset
+        self.final_positions = np.zeros((num_envs, 2), dtype=np.int64)
+        self.final_scores = np.zeros(num_envs, dtype=np.int64)
+        self._index = np.arange(num_envs)
+        self.reset()
+
+    # Draw one layout exactly like TreasureHunting.put_items ('T' first, then 'O')
+    def _put_items(self, env_index, cell_type, count):
+        rng = self.rngs[env_index]
+        grid = self.cells[env_index]
+        for _ in range(count):
+            while True:
+                x = rng.randint(0, self.size - 1)
+                y = rng.randint(0, self.size - 1)
+                if (x, y) != (0, 0) and grid[x, y] == EMPTY:
+                    grid[x, y] = cell_type
+                    break
+
+    # Reset a single env to a freshly drawn grid
+    def reset_env(self, env_index):
+        self.cells[env_index] = EMPTY
+        self.positions[env_index] = 0
+        self.scores[env_index] = 0
+        self.steps[env_index] = 0
+        self._put_items(env_index, TREASURE, self.treasure_count)
+        self._put_items(env_index, OBSTACLE, self.obstacle_count)
+        self.treasures_left[env_index] = self.treasure_count
+
+    # Reset every env and return the start positions
+    def reset(self):
+        for env_index in range(self.num_envs):
+            self.reset_env(env_index)
+        return self.positions.copy()
+
+    # Step every env with one action each (indices into ACTIONS, anything else is a no-op like an invalid move)
+    # Returns (positions, rewards, dones); positions of finished envs are already those of the new episode
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        known = (actions >= 0) & (actions < len(ACTIONS))
+        new_positions = self.positions + DELTAS[np.where(known, actions, 0)]
+
+        inside = known & np.all((new_positions >= 0) & (new_positions < self.size), axis=1)
+        clipped = np.clip(new_positions, 0, self.size - 1)
+        cell = self.cells[self._index, clipped[:, 0], clipped[:, 1]]
+        moved = inside & (cell != OBSTACLE)
+        self.positions[moved] = new_positions[moved]
+
+        # Collect treasures the agents stepped on
+        collected = moved & (cell == TREASURE)
+        self.cells[self._index[collected], new_positions[collected, 0], new_positions[collected, 1]] = EMPTY
+        rewards = collected.astype(np.int64)
+        self.scores += rewards
+        self.treasures_left -= rewards
+        self.steps += 1
+
+        # An episode ends once every treasure is collected (alive = False) or the step limit is hit
+        dones = self.treasures_left == 0
+        if self.max_steps is not None:
+            dones |= self.steps >= self.max_steps
+        if dones.any():
+            self.final_positions[dones] = self.positions[dones]
+            self.final_scores[dones] = self.scores[dones]
+            for env_index in np.flatnonzero(dones):
+                self.reset_env(env_index)
+        return self.positions.copy(), rewards, dones
+
+    # Grid of one env in the TreasureHunting list-of-strings format
+    def env_grid(self, env_index):
+        symbols = ['', 'T', 'O']
+        return [[symbols[cell] for cell in row] for row in self.cells[env_index].tolist()]
+
+    # Display the grid of one env
+    def display(self, env_index=0):
+        agent = tuple(self.positions[env_index])
+        symbols = [' . ', ' T ', ' O ']
+        for row in range(self.size):
+            grid_row = ''
+            for col in range(self.size):
+                if (row, col) == agent:
+                    grid_row += ' A '
+                else:
+                    grid_row += symbols[self.cells[env_index, row, col]]
+            print(grid_row)
+        print(f"Score: {self.scores[env_index]} | Treasures left: {self.treasures_left[env_index]}")
+        print()
+
+# Example usage
+if __name__ == '__main__':
+    import time
+
+    env = VecTreasureHunting(4096, 10, seed=0, max_steps=200)
+    rng = np.random.default_rng(0)
+    steps = 200
+    start = time.perf_counter()
+    for _ in range(steps):
+        positions, rewards, dones = env.step(rng.integers(0, len(ACTIONS), env.num_envs))
+    elapsed = time.perf_counter() - start
+    print(f"{env.num_envs * steps / elapsed:,.0f} env-steps/sec")
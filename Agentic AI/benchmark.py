@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+import json
+import multiprocessing
+import random
+import tempfile
+import time
+from array import array
+import numpy as np
+try:
+    import resource  # Peak resident memory, Unix only
+except ImportError:
+    resource = None
+
+"""
+Benchmark suite: every agent of config.json on its environment, across grid sizes and obstacle densities.
+Each cell (agent, environment, grid size, density) plays `repeats` episodes on levels from a level pack
+(Environments/levels.py), built once per (kind, size, density, seed range) in --levels-dir and reused by later runs,
+so every agent and every run plays identical, fully reachable maps. Densities only apply to TreasureHunting;
+PuzzleWithEnemies levels have no obstacles and run once per size with the task's enemy count.
+Per cell it reports the success rate (all treasures collected, or the puzzle exited through the door), deaths, env
+steps/sec, the p50/p95/p99 latency of a single decision, planner node expansions per episode and per decision (agents
+whose planner counts them, otherwise null), and the peak resident memory of the process. Cells run one after another,
+each in a fresh forked process, so the peak memory is the cell's own and timings do not compete with other cells. Short
+cells replay their levels until `min_time` of episodes was measured. A cell stops starting episodes once `time_limit` is
+used up, and an episode stops at its next decision after that (timed_out); a process still running well past the limit
+is killed and its row only carries the error. Timings move with the load of the machine, so compare runs made on the
+same, otherwise idle host.
+Results are written as JSON (or CSV). With --baseline the rows are compared with a stored run: a cell regresses when
+steps/sec drops, the p95 latency, expansions or peak memory grow by more than --tolerance (relative), or the success
+rate drops by more than --success-tolerance (absolute). Regressions are printed and the exit status is 1.
+    python3 benchmark.py --sizes 5,25,100 --output bench.json
+    python3 benchmark.py --sizes 5,25,100 --output new.json --baseline bench.json
+    python3 benchmark.py --compare new.json --baseline bench.json
+"""
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+from run import load_class, write_results
+from engine import run_episode, resolve_action, episode_solved
+from Environments.events import NullSink
+from Environments.levels import build_pack, load_pack
+
+# Level kind of each environment that can play level packs
+LEVEL_KINDS = {
+    "Environments.treasurehunting.TreasureHunting":     "treasure",
+    "Environments.puzzlewithenemies.PuzzleWithEnemies": "puzzle",
+}
+# Columns of a result row after the cell's identity
+METRICS = ("episodes", "success_rate", "death_rate", "mean_steps", "steps_per_sec", "latency_p50_us", "latency_p95_us",
+           "latency_p99_us", "expansions_per_episode", "expansions_per_decision", "peak_rss_mb", "rss_growth_mb",
+           "timed_out", "error")
+# Metric -> (direction a regression moves it, whether the tolerance is relative)
+REGRESSION_METRICS = {
+    "steps_per_sec":             (-1, True),
+    "latency_p95_us":            (+1, True),
+    "expansions_per_decision":   (+1, True),
+    "peak_rss_mb":               (+1, True),
+    "success_rate":              (-1, False),
+}
+
+
+class TimedAgent:
+    """
+    Wraps an agent for run_episode: times every decision and stops the episode once the deadline has passed.
+    """
+    def __init__(self, agent, latencies, deadline):
+        self.act = resolve_action(agent)
+        self.latencies = latencies
+        self.deadline = deadline
+        self.timed_out = False
+
+    def select_action(self, env):
+        start = time.perf_counter()
+        if start >= self.deadline:
+            self.timed_out = True
+            return None
+        action = self.act(env)
+        self.latencies.append(time.perf_counter() - start)
+        return action
+
+
+def total_expansions(agent):
+    """
+    Cells expanded by every search of the agent so far, if it (or its planner) counts them.
+    """
+    for owner in (agent, getattr(agent, "planner", None)):
+        total = getattr(owner, "total_expansions", None)
+        if total is not None:
+            return total
+    return None
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process in MB (None where the resource module is missing).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KB on Linux
+
+
+def cell_key(row):
+    """
+    What identifies a cell across runs.
+    """
+    return (row["agent"], json.dumps(row["agent_options"], sort_keys=True), row["environment"],
+            json.dumps(row["env_options"], sort_keys=True), row["grid_size"], row["density"])
+
+
+def build_cells(tasks, sizes, densities, repeats, seed, max_steps, time_limit, min_time, levels_dir, agents=None,
+                envs=None):
+    """
+    Expand the config tasks into benchmark cells, building the level packs they play on.
+    Identical tasks are benchmarked once; `agents` / `envs` keep only class paths containing one of the substrings.
+    """
+    cells, seen = [], set()
+    for task in tasks:
+        agent, environment = task["agent"], task["environment"]
+        if agents and not any(name in agent for name in agents):
+            continue
+        if envs and not any(name in environment for name in envs):
+            continue
+        kind = LEVEL_KINDS.get(environment)
+        env_options = {name: value for name, value in (task.get("env_options") or {}).items()
+                       if name not in ("level_pack", "level")}
+        for size in sizes:
+            for density in (densities if kind == "treasure" else [None]):
+                cell = {
+                    "agent":         agent,
+                    "agent_options": task.get("agent_options"),
+                    "environment":   environment,
+                    "env_options":   env_options or None,
+                    "grid_size":     size,
+                    "density":       density,
+                    "repeats":       repeats,
+                    "seed":          seed,
+                    "max_steps":     max_steps if max_steps else 20 * size,
+                    "time_limit":    time_limit,
+                    "min_time":      min_time,
+                    "level_pack":    None,
+                    "error":         None,
+                }
+                key = cell_key(cell)
+                if key in seen:
+                    continue
+                seen.add(key)
+                if kind is not None:
+                    try:
+                        cell["level_pack"] = level_pack_path(levels_dir, kind, size, density, seed, repeats,
+                                                             env_options.get("enemy_count"))
+                    except ValueError as error:
+                        cell["error"] = str(error)
+                cells.append(cell)
+    return cells
+
+
+def level_pack_path(levels_dir, kind, size, density, seed, repeats, enemies=None):
+    """
+    Path of the level pack for one (kind, size, density, enemies, seed range), generated on first use.
+    """
+    name = f"{kind}{size}_d{'default' if density is None else density}"
+    if enemies is not None:
+        name += f"_e{enemies}"
+    path = os.path.join(levels_dir, f"{name}_s{seed}-{seed + repeats}.npz")
+    if not os.path.exists(path):
+        os.makedirs(levels_dir, exist_ok=True)
+        build_pack(path, kind, size, range(seed, seed + repeats), density=density, enemies=enemies)
+    return path
+
+
+def run_cell(cell):
+    """
+    Play the episodes of one cell and return its result row.
+    """
+    EnvironmentClass = load_class(cell["environment"])
+    AgentClass       = load_class(cell["agent"])
+    pack = load_pack(cell["level_pack"]) if cell["level_pack"] else None
+    start_rss = peak_rss_mb()
+
+    latencies = array('d')
+    episodes = successes = deaths = steps = expansions = 0
+    elapsed = 0.0
+    counted = True  # Whether every agent reported its expansions
+    timed_out = False
+    deadline = time.perf_counter() + cell["time_limit"]
+    # The levels are replayed with the same seeds until min_time of episodes was measured, so short cells still time
+    # enough decisions; only an unfinished first round counts as timed out
+    repeat = 0
+    while time.perf_counter() < deadline:
+        first_round = episodes < cell["repeats"]
+        if not first_round and repeat == 0 and elapsed >= cell["min_time"]:
+            break
+        env, episode, timed, agent_expansions = play_episode(cell, EnvironmentClass, AgentClass, pack, repeat,
+                                                             deadline)
+        if timed.timed_out and not first_round:
+            break  # A replay cut short would skew the averages
+        episodes += 1
+        steps += episode["steps"]
+        elapsed += episode["elapsed"]
+        latencies.extend(timed.latencies)
+        solved = episode_solved(env)
+        successes += solved
+        deaths += not solved and not getattr(env, "alive", True)
+        if agent_expansions is None:
+            counted = False
+        else:
+            expansions += agent_expansions
+        if timed.timed_out:
+            timed_out = True
+            break
+        repeat = (repeat + 1) % cell["repeats"]
+    timed_out = timed_out or episodes < cell["repeats"]
+
+    decisions = len(latencies)
+    percentiles = np.percentile(np.frombuffer(latencies, dtype=np.float64), [50, 95, 99]) * 1e6 if decisions \
+        else [None] * 3
+    peak = peak_rss_mb()
+    return result_row(cell, {
+        "episodes":                episodes,
+        "success_rate":            successes / episodes if episodes else None,
+        "death_rate":              deaths / episodes if episodes else None,
+        "mean_steps":              steps / episodes if episodes else None,
+        "steps_per_sec":           steps / elapsed if elapsed > 0 else None,
+        "latency_p50_us":          None if percentiles[0] is None else float(percentiles[0]),
+        "latency_p95_us":          None if percentiles[1] is None else float(percentiles[1]),
+        "latency_p99_us":          None if percentiles[2] is None else float(percentiles[2]),
+        "expansions_per_episode":  expansions / episodes if counted and episodes else None,
+        "expansions_per_decision": expansions / decisions if counted and decisions else None,
+        "peak_rss_mb":             peak,
+        "rss_growth_mb":           peak - start_rss if peak is not None else None,
+        "timed_out":               timed_out,
+    })
+
+
+def play_episode(cell, EnvironmentClass, AgentClass, pack, repeat, deadline):
+    """
+    One timed episode on level `repeat`, seeded like run.py; returns the environment, the episode, the timing wrapper
+    and the agent's node expansions.
+    """
+    random.seed(cell["seed"] + repeat)
+    env_options = dict(cell["env_options"] or {})
+    if pack is not None:
+        env_options.update(level_pack=pack, level=repeat)
+    env = EnvironmentClass(cell["grid_size"], **env_options)
+    if hasattr(env, "events"):
+        env.events = NullSink()
+    agent = AgentClass(**(cell["agent_options"] or {}))
+    timed = TimedAgent(agent, array('d'), deadline)
+    episode = run_episode(env, timed, cell["max_steps"], record_path=False)
+    agent_expansions = total_expansions(agent)
+    if hasattr(agent, "close"):
+        agent.close()
+    return env, episode, timed, agent_expansions
+
+
+def result_row(cell, metrics):
+    """
+    Result row of a cell: what identifies it, then every metric (None where not measured), then the error if any.
+    """
+    row = {name: cell[name] for name in ("agent", "agent_options", "environment", "env_options", "grid_size",
+                                         "density", "repeats", "max_steps")}
+    for name in METRICS:
+        row[name] = metrics.get(name)
+    return row
+
+
+def cell_worker(cell, connection):
+    """
+    Process entry point: runs one cell and sends back its row, or the error that stopped it.
+    """
+    try:
+        row = run_cell(cell)
+    except Exception as error:
+        row = result_row(cell, {"error": f"{type(error).__name__}: {error}"})
+    connection.send(row)
+    connection.close()
+
+
+def run_isolated(cell, grace=10.0):
+    """
+    Run a cell in its own process, killing it if it overruns its time limit by more than the grace period.
+    """
+    if cell["error"]:
+        return result_row(cell, {"error": cell["error"]})
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=cell_worker, args=(cell, sender))
+    process.start()
+    sender.close()
+    limit = 2 * cell["time_limit"] + grace
+    row = None
+    if receiver.poll(limit):
+        try:
+            row = receiver.recv()
+        except EOFError:
+            pass
+    process.join(1.0)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    if row is None:
+        row = result_row(cell, {"error": f"killed after {limit:.0f}s" if process.exitcode in (None, -9)
+                                else f"worker exited with code {process.exitcode}"})
+    return row
+
+
+def run_benchmark(cells, verbose=True):
+    """
+    Run every cell, one after another, printing a line per cell.
+    """
+    results = []
+    for index, cell in enumerate(cells, 1):
+        row = run_isolated(cell)
+        results.append(row)
+        if verbose:
+            print(f"[{index}/{len(cells)}] {format_row(row)}", flush=True)
+    return results
+
+
+def cell_name(row):
+    """
+    Short label of a cell, e.g. "AStarAgent {"search": "jps"} on TreasureHunting (25x25, density 0.1)".
+    """
+    density = "default" if row["density"] is None else row["density"]
+    options = f" {json.dumps(row['agent_options'])}" if row["agent_options"] else ""
+    return (f"{row['agent'].rsplit('.', 1)[-1]}{options} on {row['environment'].rsplit('.', 1)[-1]} "
+            f"({row['grid_size']}x{row['grid_size']}, density {density})")
+
+
+def format_row(row):
+    """
+    One-line summary of a result row.
+    """
+    name = cell_name(row)
+    if row["error"]:
+        return f"{name}: error: {row['error']}"
+    line = (f"{name}: episodes={row['episodes']}, success={format_value(row['success_rate'], '.2f')}, "
+            f"died={format_value(row['death_rate'], '.2f')}, steps/sec={format_value(row['steps_per_sec'], ',.0f')}, "
+            f"p50/p95/p99={format_value(row['latency_p50_us'], ',.1f')}/{format_value(row['latency_p95_us'], ',.1f')}"
+            f"/{format_value(row['latency_p99_us'], ',.1f')}us, "
+            f"expansions/decision={format_value(row['expansions_per_decision'], ',.1f')}, "
+            f"peak={format_value(row['peak_rss_mb'], ',.0f')}MB")
+    return line + (" (timed out)" if row["timed_out"] else "")
+
+
+def format_value(value, spec):
+    return "-" if value is None else format(value, spec)
+
+
+def compare(results, baseline, tolerance=0.2, success_tolerance=0.05):
+    """
+    Regressions of `results` against `baseline`, as (row, metric, baseline value, new value) tuples.
+    Cells missing from either side, errors and metrics one side did not measure are skipped.
+    """
+    baseline_rows = {cell_key(row): row for row in baseline if not row.get("error")}
+    regressions = []
+    for row in results:
+        old = baseline_rows.get(cell_key(row))
+        if old is None or row.get("error"):
+            continue
+        for metric, (direction, relative) in REGRESSION_METRICS.items():
+            old_value, new_value = old.get(metric), row.get(metric)
+            if old_value is None or new_value is None:
+                continue
+            change = new_value - old_value
+            if relative:
+                worse = direction * change > tolerance * abs(old_value) if old_value else direction * change > 0
+            else:
+                worse = direction * change > success_tolerance
+            if worse:
+                regressions.append((row, metric, old_value, new_value))
+    return regressions
+
+
+def print_regressions(regressions):
+    if not regressions:
+        print("No regressions against the baseline.")
+        return
+    print(f"{len(regressions)} regression(s) against the baseline:")
+    for row, metric, old_value, new_value in regressions:
+        change = f" ({(new_value - old_value) / old_value:+.0%})" if old_value else ""
+        print(f"  {cell_name(row)}: {metric} {old_value:,.3f} -> {new_value:,.3f}{change}")
+
+
+def parse_list(text, kind):
+    # Comma-separated values; "default" stands for the environment's own obstacle count
+    return [None if item == "default" else kind(item) for item in text.split(",")]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every config.json agent across grid sizes and densities.")
+    parser.add_argument("--config", default=os.path.join(SCRIPT_DIR, "config.json"), help="Path to the task config")
+    parser.add_argument("--sizes", type=lambda text: parse_list(text, int), default=[5, 10, 25, 50, 100, 250, 1000],
+                        help="Comma-separated grid sizes")
+    parser.add_argument("--densities", type=lambda text: parse_list(text, float), default=[None, 0.1, 0.3],
+                        help="Comma-separated obstacle densities for TreasureHunting ('default': its own count)")
+    parser.add_argument("--agents", default=None, help="Comma-separated substrings of the agent class paths to keep")
+    parser.add_argument("--envs", default=None, help="Comma-separated substrings of the environment paths to keep")
+    parser.add_argument("--repeats", type=int, default=3, help="Episodes (levels) per cell")
+    parser.add_argument("--seed", type=int, default=0, help="First level seed")
+    parser.add_argument("--max-steps", type=int, default=None, help="Steps per episode (default: 20 x grid size)")
+    parser.add_argument("--time-limit", type=float, default=10.0, help="Seconds per cell")
+    parser.add_argument("--min-time", type=float, default=0.5,
+                        help="Seconds of episodes to measure per cell, replaying its levels if needed")
+    parser.add_argument("--levels-dir", default=os.path.join(tempfile.gettempdir(), "agentic-ai-levels"),
+                        help="Level pack cache, reused by later runs")
+    parser.add_argument("--output", default=None, help="Write results to this .json or .csv file")
+    parser.add_argument("--baseline", default=None, help="JSON results to compare against")
+    parser.add_argument("--compare", default=None, help="Compare this JSON result file instead of running")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Relative change counted as a regression")
+    parser.add_argument("--success-tolerance", type=float, default=0.05,
+                        help="Absolute success rate drop counted as a regression")
+    parser.add_argument("--quiet", action="store_true", help="No line per cell")
+    args = parser.parse_args(argv)
+    if args.compare and not args.baseline:
+        parser.error("--compare needs --baseline")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare:
+        with open(args.compare, "r") as f:
+            results = json.load(f)
+    else:
+        with open(args.config, "r") as f:
+            tasks = json.load(f).get("tasks", [])
+        cells = build_cells(tasks, args.sizes, args.densities, args.repeats, args.seed, args.max_steps,
+                            args.time_limit, args.min_time, args.levels_dir,
+                            agents=args.agents.split(",") if args.agents else None,
+                            envs=args.envs.split(",") if args.envs else None)
+        results = run_benchmark(cells, verbose=not args.quiet)
+        if args.output:
+            write_results(results, args.output)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.success_tolerance)
+        print_regressions(regressions)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
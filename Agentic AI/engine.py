@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+import inspect  # Resolve the agent's select_action signature once per episode
+import time  # Wall time and steps/sec of an episode
+from typing import Protocol  # Structural interfaces for agents and environments
+
+"""
+Episode engine shared by run.py and the other drivers.
+Agents and environments are duck-typed; the protocols below document what the engine relies on.
+Every capability (select_action signature, enemies, alive flag, treasures) is resolved once per episode,
+so the step loop only does the work that the given pair of agent and environment actually needs.
+"""
+
+# Actions an agent can return to stop the episode
+STOP_ACTIONS = (None, 'No Treasures left')
+
+
+class Environment(Protocol):
+    """
+    Required: size, agent_position, move_agent(action), display_grid().
+    Optional: exited (episode runs until it is set, e.g. a puzzle left through its door), treasures (otherwise the
+    episode runs while non-empty), score, alive, move_enemies(),
+    snapshot() / restore(token) / clone() for agents that search ahead.
+    """
+    size: int
+    agent_position: tuple
+
+    def move_agent(self, action): ...
+
+    def display_grid(self): ...
+
+
+class Agent(Protocol):
+    """
+    select_action may take no arguments, (env) or (position, env).
+    """
+    def select_action(self, *args): ...
+
+
+def resolve_action(agent):
+    """
+    Turn the agent's select_action into a callable taking the environment,
+    inspecting its signature only once.
+    """
+    select_action = agent.select_action
+    # Inspect the bound method's signature (self is already bound, so it's dropped)
+    sig      = inspect.signature(select_action)
+    n_params = len(sig.parameters)
+
+    if n_params == 0:
+        # def select_action(self)
+        return lambda env: select_action()
+    elif n_params == 1:
+        # def select_action(self, env)
+        return select_action
+    elif n_params == 2:
+        # def select_action(self, position, env)
+        return lambda env: select_action(env.agent_position, env)
+    raise TypeError(f"Unsupported select_action signature: {sig}")
+
+
+def episode_solved(env):
+    """
+    Whether the episode was won: by walking out through the exit for environments that have one (`exited`),
+    otherwise by collecting every treasure. Checked before `alive`, which TreasureHunting also clears on a win.
+    """
+    if hasattr(env, 'exited'):
+        return env.exited
+    return not getattr(env, 'treasures', [])
+
+
+def episode_outcome(env):
+    """
+    Classify how an episode ended.
+    """
+    if episode_solved(env):
+        return "Level complete." if hasattr(env, 'exited') else "All treasures collected."
+    elif hasattr(env, 'alive') and not env.alive:
+        return "Agent died."
+    return "Max steps reached or agent stopped."
+
+
+def run_episode(env, agent, max_steps, record_path=True, render_every=0):
+    """
+    Run one episode of `agent` in `env` for at most `max_steps` steps.
+    Rendering is opt-in: with render_every=N the grid is displayed after every Nth step.
+    Returns a dict with steps, score, outcome, path (None if not recorded), elapsed time and steps/sec.
+    """
+    act          = resolve_action(agent)
+    move_agent   = env.move_agent
+    move_enemies = getattr(env, 'move_enemies', None)
+    has_alive    = hasattr(env, 'alive')
+    path         = [env.agent_position] if record_path else None
+    steps        = 0
+
+    # Environments with an exit run until the agent leaves (or dies, or stops) even once the treasures are gone;
+    # the others until the treasures are gone. Without either there is nothing to do, matching run_task's original
+    # loop guard
+    if hasattr(env, 'exited'):
+        unfinished = lambda: not env.exited
+    elif hasattr(env, 'treasures'):
+        unfinished = lambda: env.treasures
+    else:
+        unfinished = None
+
+    start = time.perf_counter()
+    if unfinished is not None:
+        while unfinished() and steps < max_steps:
+            action = act(env)
+
+            # Stop signal
+            if action in STOP_ACTIONS:
+                break
+
+            if move_agent(action) and record_path:
+                path.append(env.agent_position)
+
+            # Enemies move after the agent
+            if move_enemies is not None:
+                move_enemies()
+
+            steps += 1
+            if render_every and steps % render_every == 0:
+                env.display_grid()
+            # Check if agent died
+            if has_alive and not env.alive:
+                break
+    elapsed = time.perf_counter() - start
+
+    return {
+        "steps":         steps,
+        "score":         getattr(env, 'score', 0),
+        "outcome":       episode_outcome(env),
+        "path":          path,
+        "elapsed":       elapsed,
+        "steps_per_sec": steps / elapsed if elapsed > 0 else 0.0,
+    }
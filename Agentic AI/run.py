@@ -2,15 +2,22 @@
 
 import os
 import sys
+import argparse
+import csv
 import importlib
-import inspect
 import json
-import copy
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 
 # Ensure we can always find config.json, Agents/ and Environments/ no matter where we launch
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, SCRIPT_DIR)
 
+from engine import run_episode, episode_solved
+from Environments.events import NullSink, make_sink
+
 
 def load_class(dotted_path):
     """
@@ -22,76 +29,193 @@ def load_class(dotted_path):
     return getattr(module, class_name)
 
 
-def run_task(env_class_path, agent_class_path, grid_size, max_steps):
+def run_task(env_class_path, agent_class_path, grid_size, max_steps, seed=None, verbose=True,
+             events=None, render_every=0, agent_options=None, env_options=None):
     EnvironmentClass = load_class(env_class_path)
     AgentClass       = load_class(agent_class_path)
 
-    env   = EnvironmentClass(grid_size)
-    agent = AgentClass()
-
-    print(f"\n=== Running: {agent_class_path} on {env_class_path} ===")
-    env.display_grid()
-    steps = 0
-    path  = [env.agent_position]
-
-    # Main loop
-    while getattr(env, 'treasures', []) and steps < max_steps:
-        # Inspect the bound method's signature (self is already bound, so it's dropped)
-        sig      = inspect.signature(agent.select_action)
-        n_params = len(sig.parameters)
-
-        if n_params == 0:
-            # def select_action(self)
-            action = agent.select_action()
-        elif n_params == 1:
-            # def select_action(self, env)
-            action = agent.select_action(env)
-        elif n_params == 2:
-            # def select_action(self, position, env)
-            action = agent.select_action(env.agent_position, env)
-        else:
-            raise TypeError(f"Unsupported select_action signature: {sig}")
-
-        # Stop signal
-        if action in [None, 'No Treasures left']:
-            break
-
-        moved = env.move_agent(action)
-        if moved:
-            path.append(env.agent_position)
-
-        # Optional enemy moves
-        if hasattr(env, 'move_enemies'):
-            env.move_enemies()
-
-        steps += 1
-        # Check if agent died
-        if hasattr(env, 'alive') and not env.alive:
-            break
-
-    # Summary
-    print(f"Steps: {steps}, Score: {getattr(env, 'score', 0)}")
-    print(f"Path: {path}")
-    if hasattr(env, 'alive') and not env.alive:
-        print("Result: Agent died.")
-    elif not getattr(env, 'treasures', []):
-        print("Result: All treasures collected.")
+    # Seed before the environment places its items so the whole episode is reproducible
+    if seed is not None:
+        random.seed(seed)
+    start_time = time.perf_counter()
+
+    env   = EnvironmentClass(grid_size, **(env_options or {}))
+    agent = AgentClass(**(agent_options or {}))
+    # Route environment events (treasures, switch, door, deaths) to the chosen sink
+    if events is not None and hasattr(env, 'events'):
+        env.events = events
+
+    if verbose:
+        print(f"\n=== Running: {agent_class_path} on {env_class_path} ===")
+        env.display_grid()
+    episode   = run_episode(env, agent, max_steps, record_path=verbose, render_every=render_every)
+    steps     = episode["steps"]
+    outcome   = episode["outcome"]
+    wall_time = time.perf_counter() - start_time
+    # Agents that search or learn can report their own counters (e.g. rollouts/sec)
+    agent_stats = agent.stats() if hasattr(agent, "stats") else {}
+    if hasattr(agent, "close"):
+        agent.close()
+
+    if verbose:
+        print(f"Steps: {steps}, Score: {getattr(env, 'score', 0)}, Steps/sec: {episode['steps_per_sec']:,.0f}")
+        print(f"Path: {episode['path']}")
+        print(f"Result: {outcome}")
+        if agent_stats:
+            print(f"Agent stats: {agent_stats}")
+
+    return {
+        "environment":   env_class_path,
+        "agent":         agent_class_path,
+        "agent_options": agent_options,
+        "grid_size":     grid_size,
+        "max_steps":     max_steps,
+        "seed":          seed,
+        "steps":         steps,
+        "score":         getattr(env, 'score', 0),
+        "outcome":       outcome,
+        "solved":        episode_solved(env),
+        "wall_time":     wall_time,
+        "steps_per_sec": episode["steps_per_sec"],
+        "agent_stats":   agent_stats,
+    }
+
+
+def run_job(job):
+    """
+    Worker entry point for the process pool: runs one (task, seed) pair
+    headless, with environment events dropped, and returns its result row.
+    """
+    return run_task(verbose=False, events=NullSink(), **job)
+
+
+def build_jobs(tasks, repeats, base_seed):
+    """
+    Expand every task into `repeats` jobs, seeded by repeat index only: repeat r of every task
+    gets base_seed + r, so tasks with the same environment and grid size play the same maps
+    (and reuse the cached distance tables of those maps).
+    """
+    jobs = []
+    for task in tasks:
+        for repeat in range(repeats):
+            jobs.append({
+                "env_class_path":   task["environment"],
+                "agent_class_path": task["agent"],
+                "grid_size":        task.get("grid_size", 5),
+                "max_steps":        task.get("max_steps", 100),
+                "agent_options":    task.get("agent_options"),
+                "env_options":      task.get("env_options"),
+                "seed":             base_seed + repeat,
+            })
+    return jobs
+
+
+def run_parallel(tasks, repeats=1, base_seed=0, workers=None):
+    """
+    Spread every task and repeat across a process pool.
+    Results come back in job order regardless of which worker finished first.
+    """
+    jobs = build_jobs(tasks, repeats, base_seed)
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run_job, jobs, chunksize=chunksize))
+
+
+def write_results(results, output_path):
+    """
+    Write result rows as CSV or JSON, chosen by the file extension.
+    """
+    if output_path.endswith(".csv"):
+        with open(output_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0].keys()) if results else [])
+            writer.writeheader()
+            writer.writerows(results)
     else:
-        print("Result: Max steps reached or agent stopped.")
+        with open(output_path, "w") as f:
+            json.dump(results, f, indent=2)
 
 
-def main():
-    config_path = os.path.join(SCRIPT_DIR, "config.json")
-    with open(config_path, "r") as f:
+def print_summary(results):
+    """
+    Print one aggregated line per (agent, agent options, environment, grid size).
+    """
+    groups = {}
+    for row in results:
+        options = json.dumps(row.get("agent_options") or {}, sort_keys=True)
+        groups.setdefault((row["agent"], options, row["environment"], row["grid_size"]), []).append(row)
+    for (agent, options, environment, grid_size), rows in groups.items():
+        runs   = len(rows)
+        solved = sum(row["solved"] for row in rows)
+        died   = sum(row["outcome"] == "Agent died." for row in rows)
+        label  = agent if options == "{}" else f"{agent} {options}"
+        print(f"{label} on {environment} ({grid_size}x{grid_size}): runs={runs}, "
+              f"mean steps={sum(row['steps'] for row in rows) / runs:.1f}, "
+              f"mean score={sum(row['score'] for row in rows) / runs:.2f}, "
+              f"solved={solved}, died={died}, "
+              f"wall time={sum(row['wall_time'] for row in rows):.3f}s"
+              + format_agent_stats(rows))
+
+
+def format_agent_stats(rows):
+    """
+    Mean of every numeric agent stat over the rows, as a ", name=value" suffix.
+    """
+    sums = {}
+    for row in rows:
+        for name, value in row.get("agent_stats", {}).items():
+            if isinstance(value, (int, float)):
+                sums[name] = sums.get(name, 0) + value
+    return "".join(f", {name}={total / len(rows):,.1f}" for name, total in sums.items())
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the agent/environment tasks listed in config.json.")
+    parser.add_argument("--config", default=os.path.join(SCRIPT_DIR, "config.json"), help="Path to the task config")
+    parser.add_argument("--parallel", action="store_true", help="Run tasks across a process pool")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes (default: all cores)")
+    parser.add_argument("--repeats", type=int, default=1, help="Seeds to run per task in parallel mode")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed; repeat r of every task uses seed + r")
+    parser.add_argument("--output", default=None, help="Write results to this .json or .csv file")
+    parser.add_argument("--quiet", action="store_true", help="Headless: no grids or paths, events only counted")
+    parser.add_argument("--events", choices=["print", "null", "counter", "ring", "jsonl"], default=None,
+                        help="Where environment events go (default: print, or counter with --quiet)")
+    parser.add_argument("--events-file", default=None, help="Output file for --events jsonl")
+    parser.add_argument("--render-every", type=int, default=0, help="Display the grid every N steps (0: never)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with open(args.config, "r") as f:
         config = json.load(f)
+    tasks = config.get("tasks", [])
 
-    for task in config.get("tasks", []):
-        run_task(
-            env_class_path   = task["environment"],
-            agent_class_path = task["agent"],
-            grid_size        = task.get("grid_size", 5),
-            max_steps        = task.get("max_steps", 100)
-        )
+    if args.parallel:
+        results = run_parallel(tasks, repeats=args.repeats, base_seed=args.seed, workers=args.workers)
+        print_summary(results)
+    else:
+        sink = make_sink(args.events or ("counter" if args.quiet else "print"), path=args.events_file)
+        results = []
+        for task in tasks:
+            results.append(run_task(
+                env_class_path   = task["environment"],
+                agent_class_path = task["agent"],
+                grid_size        = task.get("grid_size", 5),
+                max_steps        = task.get("max_steps", 100),
+                agent_options    = task.get("agent_options"),
+                env_options      = task.get("env_options"),
+                verbose          = not args.quiet,
+                events           = sink,
+                render_every     = args.render_every
+            ))
+        sink.close()
+        if args.quiet:
+            print_summary(results)
+            if hasattr(sink, "counts"):
+                print(f"Events: {dict(sink.counts)}")
+
+    if args.output:
+        write_results(results, args.output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+# Lets the tests import Agents/ and Environments/ the way run.py does
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
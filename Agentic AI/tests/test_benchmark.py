@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+# Benchmark cells
+
+from benchmark import build_cells, run_cell
+
+
+# A puzzle is only solved by walking out through the door, after the last treasure has been picked up
+def test_planner_solves_small_puzzle_levels(tmp_path):
+    tasks = [{
+        "environment":   "Environments.puzzlewithenemies.PuzzleWithEnemies",
+        "agent":         "Agents.a_star.AStarAgent",
+        "agent_options": {"avoid_enemies": True},
+        "env_options":   {"enemy_count": 0},
+    }]
+    cells = build_cells(tasks, sizes=[6], densities=[None], repeats=5, seed=0, max_steps=None, time_limit=30.0,
+                        min_time=0.0, levels_dir=str(tmp_path))
+    assert len(cells) == 1 and cells[0]["error"] is None
+    row = run_cell(cells[0])
+    assert row["episodes"] == 5
+    assert row["success_rate"] == 1.0
+    assert row["death_rate"] == 0.0
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+# Episode outcomes reported by the engine
+
+from engine import run_episode, episode_solved
+from Environments.levels import LevelPack, generate_level
+from Environments.treasurehunting import TreasureHunting
+from Agents.tourplanner import TourPlanningAgent
+
+
+# TreasureHunting clears `alive` with the last treasure, which must still count as a win
+def test_collecting_every_treasure_is_not_a_death():
+    pack = LevelPack.from_levels('treasure', [generate_level('treasure', 5, seed=0)])
+    env = TreasureHunting(5, level_pack=pack, level=0)
+    episode = run_episode(env, TourPlanningAgent(), 100, record_path=False)
+    assert not env.alive
+    assert episode_solved(env)
+    assert episode["outcome"] == "All treasures collected."
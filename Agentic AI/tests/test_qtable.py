@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+# Dense Q-table updates
+
+import numpy as np
+from Agents.q_learning import QLearningAgent
+from Agents.sarsa import SARSAAgent
+
+
+# The next state growing the table must not move the value being updated
+def test_sarsa_update_that_grows_the_table():
+    agent = SARSAAgent(q_backend='dense', size=2)
+    agent.alpha = 1.0
+    agent.gamma = 1.0
+    agent.dense_table().q[1, 0, 0] = 1.0
+    agent.update_q_table((1, 0), 'UP', 4.0, (2, 0), 'UP')
+    table = agent.dense_table()
+    assert table.q[1, 0, 0] == 4.0
+    assert table.q[0, 2].tolist() == [0.0, 0.0, 0.0, 0.0]
+
+
+# Many envs reaching the same terminal transition in one batch move its value once, towards the target
+def test_update_batch_with_repeated_pairs_converges():
+    agent = SARSAAgent(q_backend='dense', size=2)
+    agent.dense_table().q[0, 0, 0] = 5.0
+    copies = 50
+    for _ in range(200):
+        agent.apply_batch([(0, 0)] * copies, [0] * copies, [1.0] * copies, np.zeros(copies), [True] * copies)
+    assert abs(agent.dense_table().q[0, 0, 0] - 1.0) < 1e-3
+
+
+def test_q_learning_update_batch_with_repeated_pairs_converges():
+    agent = QLearningAgent(q_backend='dense', size=2)
+    agent.dense_table().q[0, 0, 0] = 5.0
+    copies = 50
+    for _ in range(200):
+        agent.update_batch([(0, 0)] * copies, [0] * copies, [1.0] * copies, [(0, 1)] * copies, [True] * copies)
+    assert abs(agent.dense_table().q[0, 0, 0] - 1.0) < 1e-3
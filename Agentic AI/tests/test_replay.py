@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+
+# Experience replay on the dense Q-table
+
+import numpy as np
+from Agents.qtable import DenseQTable
+from Agents.replay import ReplayBuffer, replay_update, replay
+from Agents.q_learning import QLearningAgent
+
+
+# One terminal transition drawn many times in a batch must move Q towards its target once, not once per copy
+def test_duplicates_in_a_batch_are_averaged():
+    buffer = ReplayBuffer(capacity=16, seed=0)
+    buffer.add((0, 0), 'RIGHT', 1.0, (0, 1), done=True)
+    table = DenseQTable(2)
+    values = []
+    for _ in range(4):
+        batch, _, _ = buffer.sample(64)
+        replay_update(table, batch, alpha=0.1, gamma=0.9)
+        values.append(float(table.q[0, 0, 3]))
+    np.testing.assert_allclose(values, [0.1, 0.19, 0.271, 0.3439], rtol=1e-5)
+
+
+def test_replay_waits_for_a_full_batch():
+    agent = QLearningAgent('dense', 2)
+    buffer = ReplayBuffer(capacity=16, seed=0)
+    buffer.add((0, 0), 'RIGHT', 1.0, (0, 1), done=True)
+    assert replay(agent, buffer, batch_size=4) is None
+    assert agent.dense_table().q[0, 0, 3] == 0.0
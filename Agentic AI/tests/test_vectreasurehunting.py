@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+# Batched TreasureHunting grids against the scalar environment
+
+import random
+import numpy as np
+from Environments.treasurehunting import TreasureHunting
+from Environments.vectreasurehunting import VecTreasureHunting
+
+
+# Env i of a batch seeded with `seed` lays out the grids of TreasureHunting(size, rng=random.Random(seed + i))
+def test_env_i_reproduces_treasure_hunting_with_its_own_generator():
+    seed, size = 7, 8
+    batch = VecTreasureHunting(3, size, seed=seed)
+    for env_index in range(3):
+        env = TreasureHunting(size, rng=random.Random(seed + env_index))
+        for _ in range(2):
+            expected = np.frombuffer(bytes(env.state.cells), dtype=np.uint8).reshape(size, size)
+            np.testing.assert_array_equal(batch.cells[env_index], expected)
+            env.reset()
+            batch.reset_env(env_index)
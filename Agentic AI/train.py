@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import argparse
+import inspect
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+"""
+Training driver for the learning agents (Q-Learning, SARSA, Learning and Hybrid).
+run.py only asks agents for actions; here every transition is fed back through update_q_table.
+Rewards are the change of the environment's score, so they match what run.py reports. A death can cost an
+extra penalty. An episode ends when the treasures are gone, the agent dies or exits through the door, or after
+max_steps. SARSA (an update_q_table taking next_action) gets the action it will actually take next.
+With a replay buffer (Agents/replay.py, dense Q-tables only) every transition is also stored, and every replay_every
+steps a minibatch of past transitions is replayed into the Q-table in one vectorized update.
+Exploration follows an epsilon schedule over the episodes, and every eval_every episodes the greedy policy
+(epsilon = 0, no updates) is evaluated on the same layout. The learning curve is printed and can be written
+as JSON or CSV.
+Training runs headless: no rendering, events dropped, and a plain step loop without per-step bookkeeping.
+With workers > 1 (Agents/hogwild.py) actor processes train Hogwild-style into one shared-memory Q-table.
+"""
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+from run import load_class, write_results
+from Environments.events import NullSink
+from Agents.replay import ReplayBuffer, replay
+
+
+def epsilon_schedule(kind, start, end, episodes):
+    """
+    Exploration rate for each episode: constant, linear or exponential decay from `start` to `end`.
+    """
+    span = max(1, episodes - 1)
+    if kind == "constant":
+        return lambda episode: start
+    if kind == "linear":
+        return lambda episode: start + (end - start) * min(1.0, episode / span)
+    if kind == "exponential":
+        ratio = (max(end, 1e-9) / start) ** (1 / span) if start > 0 else 0.0
+        return lambda episode: max(end, start * ratio ** episode)
+    raise ValueError(f"Unknown epsilon schedule: {kind}")
+
+
+def learner_of(agent):
+    """
+    The object holding epsilon and the Q-table: the agent itself, or the learning agent inside a HybridAgent.
+    """
+    return getattr(agent, "learning_agent", agent)
+
+
+def resolve_update(agent):
+    """
+    The agent's update_q_table and whether it is on-policy (SARSA's extra next_action argument).
+    """
+    update = agent.update_q_table
+    learner = learner_of(agent)
+    parameters = inspect.signature(learner.update_q_table).parameters
+    return update, "next_action" in parameters
+
+
+def make_env(env_class_path, grid_size, rng):
+    """
+    Environment with its own generator, so resetting it does not replay the agent's random draws.
+    """
+    EnvironmentClass = load_class(env_class_path)
+    env = EnvironmentClass(grid_size, rng=rng)
+    if hasattr(env, "events"):
+        env.events = NullSink()
+    return env
+
+
+def run_episode(env, agent, update, on_policy, max_steps, death_penalty=0.0, learn=True, buffer=None,
+                replay_every=1, replay_batch=64):
+    """
+    Play one episode, updating the agent after every transition when `learn` is set.
+    With a `buffer`, transitions are also stored and replayed in minibatches every `replay_every` steps.
+    Returns (return, steps, outcome) with outcome one of "collected", "died", "exited", "timeout".
+    """
+    select_action = agent.select_action
+    move_agent    = env.move_agent
+    move_enemies  = getattr(env, "move_enemies", None)
+    total, steps, outcome = 0.0, 0, "timeout"
+    state  = env.agent_position
+    action = select_action(env)
+    while steps < max_steps:
+        score  = env.score
+        result = move_agent(action)
+        if move_enemies is not None and result != "exit":
+            move_enemies()
+        steps += 1
+        next_state = env.agent_position
+        reward = env.score - score
+        if not env.treasures:
+            done, outcome = True, "collected"
+        elif not getattr(env, "alive", True):
+            done, outcome = True, "died"
+            reward -= death_penalty
+        elif result == "exit":
+            done, outcome = True, "exited"
+        else:
+            done = False
+        total += reward
+        next_action = None if done else select_action(env)
+        if learn:
+            if on_policy:
+                update(state, action, reward, next_state, next_action or action, done=done)
+            else:
+                update(state, action, reward, next_state, done=done)
+            if buffer is not None:
+                buffer.add(state, action, reward, next_state, done)
+                if steps % replay_every == 0:
+                    replay(learner_of(agent), buffer, replay_batch)
+        if done:
+            break
+        state, action = next_state, next_action
+    return total, steps, outcome
+
+
+def evaluate(env, agent, update, on_policy, reset, episodes, max_steps, death_penalty):
+    """
+    Greedy policy (epsilon = 0, no updates) over `episodes` episodes.
+    """
+    learner = learner_of(agent)
+    epsilon, learner.epsilon = learner.epsilon, 0.0
+    returns, steps, collected, died = 0.0, 0, 0, 0
+    for episode in range(episodes):
+        reset(episode)
+        ret, n, outcome = run_episode(env, agent, update, on_policy, max_steps, death_penalty, learn=False)
+        returns += ret
+        steps += n
+        collected += outcome == "collected"
+        died += outcome == "died"
+    learner.epsilon = epsilon
+    return {
+        "eval_return":    returns / episodes,
+        "eval_steps":     steps / episodes,
+        "eval_collected": collected / episodes,
+        "eval_died":      died / episodes,
+    }
+
+
+def episode_resetter(env, env_rng, seed, layout):
+    """
+    Function starting episode number `episode` on `env`.
+    With layout="fixed" every episode starts from the same level (restored from a snapshot, with fresh enemy moves);
+    with layout="random" the environment is reset to a new level every episode.
+    """
+    if layout == "fixed":
+        start = env.snapshot()
+
+        def reset(episode):
+            env.restore(start)
+            env_rng.seed(seed * 1000003 + episode)  # Same level, new enemy moves
+        return reset
+    if layout == "random":
+        def reset(episode):
+            env.reset()
+        return reset
+    raise ValueError(f"Unknown layout: {layout}")
+
+
+def train_episodes(env, agent, update, on_policy, reset, episodes, epsilon, max_steps, death_penalty=0.0,
+                   buffer=None, replay_every=1, replay_batch=64):
+    """
+    Train on the given episode numbers. Returns (transitions, summed return, episodes with every treasure collected).
+    """
+    learner = learner_of(agent)
+    transitions, returns, collected = 0, 0.0, 0
+    for episode in episodes:
+        learner.epsilon = epsilon(episode)
+        reset(episode)
+        ret, steps, outcome = run_episode(env, agent, update, on_policy, max_steps, death_penalty,
+                                          buffer=buffer, replay_every=replay_every, replay_batch=replay_batch)
+        transitions += steps
+        returns += ret
+        collected += outcome == "collected"
+    return transitions, returns, collected
+
+
+def actor(settings, first, last):
+    """
+    Worker process entry point for --workers: train episodes first..last-1 into the shared Q-table.
+    Each actor builds its own environment from the same seed, so with layout="fixed" it plays the same level.
+    """
+    seed = settings["seed"]
+    random.seed(seed * 1000003 + first)
+    env_rng = random.Random(seed)
+    env = make_env(settings["environment"], settings["grid_size"], env_rng)
+    agent = load_class(settings["agent"])(**settings["agent_options"])
+    learner = learner_of(agent)
+    if hasattr(learner, "online"):
+        learner.online = False
+    update, on_policy = resolve_update(agent)
+    try:
+        return train_episodes(env, agent, update, on_policy, episode_resetter(env, env_rng, seed, settings["layout"]),
+                              range(first, last), epsilon_schedule(*settings["schedule"]), settings["max_steps"],
+                              settings["death_penalty"])
+    finally:
+        agent.close()  # Detaches from the shared table
+
+
+def train(env_class_path, agent_class_path, grid_size=5, episodes=1000, max_steps=100, seed=0,
+          schedule="linear", epsilon_start=1.0, epsilon_end=0.05, eval_every=100, eval_episodes=10,
+          layout="fixed", death_penalty=0.0, agent_options=None, replay_capacity=0, replay_every=1,
+          replay_batch=64, prioritized=False, workers=1, save_q_table=None, verbose=True):
+    """
+    Train one agent and return its learning curve (one row per evaluation checkpoint).
+    replay_capacity > 0 turns on experience replay (prioritized or uniform) for agents with a dense Q-table.
+    workers > 1 splits the episodes between checkpoints across actor processes writing into one shared-memory
+    Q-table (Agents/hogwild.py); the checkpoints are evaluated in this process.
+    save_q_table writes the final Q-values as a (size, size, 4) .npy array, for agents with a dense or shared table.
+    """
+    random.seed(seed)
+    env_rng = random.Random(seed)
+    env   = make_env(env_class_path, grid_size, env_rng)
+    agent = load_class(agent_class_path)(**(agent_options or {}))
+    update, on_policy = resolve_update(agent)
+    epsilon = epsilon_schedule(schedule, epsilon_start, epsilon_end, episodes)
+    learner = learner_of(agent)
+    if hasattr(learner, "online"):
+        learner.online = False  # Transitions come from this loop, not from select_action
+    buffer = ReplayBuffer(replay_capacity, prioritized=prioritized, seed=seed) if replay_capacity else None
+    if buffer is not None:
+        learner.dense_table()  # Fails early for dict Q-tables
+    reset = episode_resetter(env, env_rng, seed, layout)
+
+    pool = None
+    if workers > 1:
+        if not hasattr(learner, "table_name"):
+            raise ValueError("workers > 1 needs a shared-memory agent such as Agents.hogwild.HogwildQLearningAgent")
+        if buffer is not None:
+            raise ValueError("Experience replay is not supported with workers > 1")
+        settings = {
+            "environment":   env_class_path,
+            "agent":         agent_class_path,
+            "agent_options": {**(agent_options or {}), "table_name": learner.table_name},
+            "grid_size":     grid_size,
+            "seed":          seed,
+            "layout":        layout,
+            "max_steps":     max_steps,
+            "death_penalty": death_penalty,
+            "schedule":      (schedule, epsilon_start, epsilon_end, episodes),
+        }
+        pool = ProcessPoolExecutor(max_workers=workers)
+
+    eval_env_rng = random.Random(seed)
+    eval_env = make_env(env_class_path, grid_size, eval_env_rng)
+    eval_start = eval_env.snapshot() if layout == "fixed" else None
+
+    def eval_reset(episode):
+        # Evaluation levels and enemy moves are the same at every checkpoint
+        if eval_start is not None:
+            eval_env.restore(eval_start)
+        else:
+            eval_env.reset()
+        eval_env_rng.seed(seed * 1000003 - 1 - episode)
+
+    curve = []
+    transitions = 0
+    started = time.perf_counter()
+    try:
+        for first in range(0, episodes, eval_every):
+            last = min(first + eval_every, episodes)
+            if pool is None:
+                steps, returns, collected = train_episodes(env, agent, update, on_policy, reset, range(first, last),
+                                                           epsilon, max_steps, death_penalty, buffer, replay_every,
+                                                           replay_batch)
+            else:
+                # Contiguous blocks of episodes, one per actor
+                bounds = [first + (last - first) * worker // workers for worker in range(workers + 1)]
+                futures = [pool.submit(actor, settings, lo, hi) for lo, hi in zip(bounds, bounds[1:]) if hi > lo]
+                results = [future.result() for future in futures]
+                steps, returns, collected = (sum(column) for column in zip(*results))
+            transitions += steps
+            elapsed = time.perf_counter() - started
+            row = {
+                "environment":       env_class_path,
+                "agent":             agent_class_path,
+                "episode":           last,
+                "epsilon":           epsilon(last - 1),
+                "train_return":      returns / (last - first),
+                "train_collected":   collected / (last - first),
+                "transitions":       transitions,
+                "transitions_per_min": transitions / elapsed * 60 if elapsed > 0 else math.inf,
+            }
+            row.update(evaluate(eval_env, agent, update, on_policy, eval_reset, eval_episodes, max_steps,
+                                death_penalty))
+            curve.append(row)
+            if verbose:
+                print(f"episode {row['episode']:>7}: epsilon={row['epsilon']:.3f}, "
+                      f"train return={row['train_return']:.2f}, eval return={row['eval_return']:.2f}, "
+                      f"eval collected={row['eval_collected']:.0%}, eval died={row['eval_died']:.0%}, "
+                      f"{row['transitions_per_min']:,.0f} transitions/min")
+        if save_q_table:
+            if hasattr(learner, "export_q_table"):
+                learner.export_q_table(save_q_table)
+            else:
+                np.save(save_q_table, learner.dense_table().q)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if hasattr(agent, "close"):
+            agent.close()
+    return curve
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train a learning agent and report its learning curve.")
+    parser.add_argument("--environment", default="Environments.treasurehunting.TreasureHunting")
+    parser.add_argument("--agent", default="Agents.q_learning.QLearningAgent")
+    parser.add_argument("--agent-options", default=None, help='JSON object of agent options, e.g. \'{"q_backend": "dense"}\'')
+    parser.add_argument("--grid-size", type=int, default=5)
+    parser.add_argument("--episodes", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--schedule", choices=["constant", "linear", "exponential"], default="linear",
+                        help="Epsilon schedule over the episodes")
+    parser.add_argument("--epsilon-start", type=float, default=1.0)
+    parser.add_argument("--epsilon-end", type=float, default=0.05)
+    parser.add_argument("--eval-every", type=int, default=100, help="Episodes between greedy evaluations")
+    parser.add_argument("--eval-episodes", type=int, default=10)
+    parser.add_argument("--layout", choices=["fixed", "random"], default="fixed",
+                        help="Train on one level (fixed) or a new level every episode (random)")
+    parser.add_argument("--death-penalty", type=float, default=0.0, help="Reward subtracted when the agent dies")
+    parser.add_argument("--replay-capacity", type=int, default=0,
+                        help="Experience replay buffer size (0 = off); needs a dense Q-table")
+    parser.add_argument("--replay-every", type=int, default=1, help="Environment steps between replayed minibatches")
+    parser.add_argument("--replay-batch", type=int, default=64, help="Transitions per replayed minibatch")
+    parser.add_argument("--prioritized", action="store_true", help="Sample replayed transitions by TD error")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Actor processes sharing one Q-table (needs Agents.hogwild.HogwildQLearningAgent)")
+    parser.add_argument("--save-q-table", default=None, help="Write the final Q-values to this .npy file")
+    parser.add_argument("--output", default=None, help="Write the learning curve to this .json or .csv file")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final checkpoint")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    curve = train(
+        env_class_path   = args.environment,
+        agent_class_path = args.agent,
+        grid_size        = args.grid_size,
+        episodes         = args.episodes,
+        max_steps        = args.max_steps,
+        seed             = args.seed,
+        schedule         = args.schedule,
+        epsilon_start    = args.epsilon_start,
+        epsilon_end      = args.epsilon_end,
+        eval_every       = args.eval_every,
+        eval_episodes    = args.eval_episodes,
+        layout           = args.layout,
+        death_penalty    = args.death_penalty,
+        agent_options    = json.loads(args.agent_options) if args.agent_options else None,
+        replay_capacity  = args.replay_capacity,
+        replay_every     = args.replay_every,
+        replay_batch     = args.replay_batch,
+        prioritized      = args.prioritized,
+        workers          = args.workers,
+        save_q_table     = args.save_q_table,
+        verbose          = not args.quiet,
+    )
+    if args.quiet and curve:
+        print(curve[-1])
+    if args.output:
+        write_results(curve, args.output)
+
+
+if __name__ == "__main__":
+    main()